@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        import api.signals  # noqa: F401
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from api.utils.metrics import install_query_timing
+
+        if settings.REQUEST_METRICS_ENABLED:
+            connection_created.connect(install_query_timing)
@@ -0,0 +1,166 @@
+from typing import Callable, Dict, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.urls import re_path
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+from api.utils.catalog import (aget_catalog_version, get_catalog_etag,
+                               patch_catalog_headers)
+from api.utils.recipe_values import get_recipe_rows, serialize_recipe_rows
+from api.utils.recipes_cache import (aget_recipes_list_version,
+                                     get_recipes_list_cache_key,
+                                     is_recipes_list_cacheable,
+                                     overlay_user_flags, strip_user_flags)
+from api.utils.replica import is_replica_settled, replica_reads
+from recipes.models import Ingredients
+
+
+def is_json_request(request) -> bool:
+    accept = request.META.get('HTTP_ACCEPT', '*/*')
+    return ('format' not in request.GET and 'text/html' not in accept
+            and ('application/json' in accept or '*/*' in accept))
+
+
+def get_serializer_data(view, instance) -> Dict:
+    return view.get_serializer(instance).data
+
+
+async def aget_object(view, queryset):
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        instance = await queryset.filter(**{
+            view.lookup_field: view.kwargs[lookup_url_kwarg]}).afirst()
+    except (TypeError, ValueError, ValidationError):
+        instance = None
+    if instance is None:
+        raise Http404
+    await sync_to_async(view.check_object_permissions)(view.request,
+                                                       instance)
+    return instance
+
+
+async def catalog_list(view, request):
+    model = view.queryset.model
+    if model is Ingredients and (request.query_params.get('name')
+                                 or request.query_params.get('search')):
+        return await sync_to_async(view.list)(request)
+
+    version = await aget_catalog_version(model)
+    etag = get_catalog_etag(model, version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(
+            await sync_to_async(view.get_catalog_payload)(version))
+    return patch_catalog_headers(response, etag)
+
+
+async def catalog_detail(view, request, pk):
+    instance = await aget_object(view, await sync_to_async(
+        view.filter_queryset)(view.get_queryset()))
+    return Response(await sync_to_async(get_serializer_data)(view,
+                                                             instance))
+
+
+async def recipes_list(view, request):
+    cache_key = None
+    if is_recipes_list_cacheable(request):
+        cache_key = await sync_to_async(get_recipes_list_cache_key)(request)
+        data = await cache.aget(cache_key)
+        if data is not None:
+            return Response(await sync_to_async(overlay_user_flags)(
+                data, request.user))
+
+    queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    page = await view.paginator.apaginate_queryset(
+        get_recipe_rows(queryset), request, view=view)
+    response = view.get_paginated_response(
+        await sync_to_async(serialize_recipe_rows)(page, request))
+    if cache_key is not None and is_replica_settled(
+            await aget_recipes_list_version()):
+        await cache.aset(cache_key, strip_user_flags(response.data),
+                         settings.RECIPES_LIST_CACHE_TIMEOUT)
+    return response
+
+
+async def recipes_detail(view, request, pk):
+    queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    try:
+        rows = [row async for row in get_recipe_rows(
+            queryset.filter(pk=pk))]
+    except (TypeError, ValueError):
+        rows = []
+    if not rows:
+        raise Http404
+    return Response(
+        (await sync_to_async(serialize_recipe_rows)(rows, request))[0])
+
+
+async def users_me(view, request):
+    user = await view.get_queryset().filter(pk=request.user.pk).afirst()
+    if user is None:
+        raise Http404
+    return Response(await sync_to_async(get_serializer_data)(view, user))
+
+
+ASYNC_READ_VIEWS: Dict[str, Callable] = {
+    'tags-list': catalog_list,
+    'tags-detail': catalog_detail,
+    'ingredients-list': catalog_list,
+    'ingredients-detail': catalog_detail,
+    'recipes-list': recipes_list,
+    'recipes-detail': recipes_detail,
+    'users-get-me': users_me,
+}
+
+
+def get_view(sync_view: Callable, request, kwargs: Dict):
+    view = sync_view.cls(**sync_view.initkwargs)
+    view.action_map = sync_view.actions
+    for method, action in sync_view.actions.items():
+        setattr(view, method, getattr(view, action))
+    if 'get' in sync_view.actions and 'head' not in sync_view.actions:
+        view.head = view.get
+    view.args, view.kwargs = (), kwargs
+    view.request = view.initialize_request(request, **kwargs)
+    view.headers = view.default_response_headers
+    return view
+
+
+def async_read_view(async_view: Callable, sync_view: Callable) -> Callable:
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or not is_json_request(request):
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        api_view = get_view(sync_view, request, kwargs)
+        request = api_view.request
+        token = replica_reads.set(False)
+        try:
+            await sync_to_async(api_view.initial)(request, **kwargs)
+            response = await async_view(api_view, request, **kwargs)
+        except Exception as exc:
+            response = api_view.handle_exception(exc)
+        finally:
+            replica_reads.reset(token)
+        api_view.response = api_view.finalize_response(request, response,
+                                                       **kwargs)
+        return api_view.response
+
+    view.csrf_exempt = True
+    return view
+
+
+def get_async_urlpatterns(router) -> List:
+    return [
+        re_path(str(url.pattern), async_read_view(ASYNC_READ_VIEWS[url.name],
+                                                  url.callback),
+                name=url.name)
+        for url in router.urls
+        if url.name in ASYNC_READ_VIEWS
+        and 'format' not in url.pattern.regex.groupindex
+    ]
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.images import generate_image_variants
+from recipes.models import Recipes
+
+
+class Command(BaseCommand):
+    help = 'generate card, thumbnail and WebP variants for recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='regenerate existing variants')
+        parser.add_argument('--workers', type=int,
+                            default=settings.RECIPE_IMAGE_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+
+        recipes = Recipes.objects.exclude(image='').exclude(image=None)
+        if not options['force']:
+            recipes = recipes.filter(image_variants={})
+        recipe_ids = recipes.values_list('pk', flat=True).iterator(
+            chunk_size=options['batch_size'])
+
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = executor.map(self.generate, recipe_ids)
+            for recipe_id, error in futures:
+                if error is None:
+                    processed += 1
+                    continue
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинки обработаны: {processed}, ошибок: {failed}'))
+
+    def generate(self, recipe_id):
+        try:
+            generate_image_variants(recipe_id)
+        except Exception as error:
+            return recipe_id, error
+        return recipe_id, None
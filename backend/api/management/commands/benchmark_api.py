@@ -0,0 +1,307 @@
+import json
+from base64 import b64encode
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.urls import router_v1
+from recipes.management.commands.generate_data import GENERATED_PASSWORD
+from recipes.models import (FavoriteRecipes, Ingredients, Recipes,
+                            ShoppingCart, Tags)
+from users.models import User, UsersFollowing
+
+VIEWSET_ROUTES: Tuple[Tuple[str, str, bool], ...] = (
+    ('list', 'get', False),
+    ('create', 'post', False),
+    ('retrieve', 'get', True),
+    ('partial_update', 'patch', True),
+    ('destroy', 'delete', True),
+)
+AUTH_ROUTES: Tuple[Tuple[str, str], ...] = (
+    ('login', 'post'),
+    ('logout', 'post'),
+)
+BULK_ROUTES: Dict[str, str] = {
+    'recipes-bulk-favorite': 'recipe_ids',
+    'recipes-bulk-shopping-cart': 'recipe_ids',
+    'users-bulk-subscribe': 'author_ids',
+}
+ROUTE_VARIANTS: Dict[str, Dict[str, Dict]] = {
+    'recipes-list': {
+        'tags': {'tags': 'tags'},
+        'is_in_shopping_cart': {'is_in_shopping_cart': 1},
+        'cursor': {'cursor': '', 'limit': 6},
+    },
+    'ingredients-list': {
+        'name': {'name': 'сол'},
+    },
+    'users-subscribtions': {
+        'recipes_limit': {'recipes_limit': 3},
+    },
+}
+
+
+def get_image_payload() -> str:
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + b64encode(buffer.getvalue()).decode()
+
+
+class Command(BaseCommand):
+    help = 'benchmark every api route against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--cold', action='store_true',
+                            help='clear the cache before every request')
+        parser.add_argument('--route', action='append', default=None,
+                            help='only run routes starting with this name')
+        parser.add_argument('--output', type=Path, default=None,
+                            help='write results to this JSON file')
+        parser.add_argument('--compare', type=Path, default=None,
+                            help='previous JSON results to compare with')
+
+    def get_routes(self) -> List[Tuple[str, str, bool]]:
+        routes = []
+        for _, viewset, basename in router_v1.registry:
+            allowed = getattr(viewset, 'http_method_names', [])
+            for action, method, detail in VIEWSET_ROUTES:
+                if hasattr(viewset, action) and method in allowed:
+                    suffix = 'detail' if detail else 'list'
+                    routes.append((f'{basename}-{suffix}', method, detail))
+            for action in viewset.get_extra_actions():
+                for method in action.mapping:
+                    routes.append((f'{basename}-{action.url_name}', method,
+                                   action.detail))
+        routes.extend((name, method, False) for name, method in AUTH_ROUTES)
+        return routes
+
+    def get_fixtures(self) -> Dict:
+        user = User.objects.annotate(carts=Count(
+            'shopcart', filter=Q(shopcart__is_in_shopping_cart=True)
+        )).filter(recipes__isnull=False).order_by('-carts', 'pk').first()
+        if user is None:
+            raise CommandError('Нет данных, запустите generate_data')
+        if not user.check_password(GENERATED_PASSWORD):
+            user.set_password(GENERATED_PASSWORD)
+            user.save(update_fields=['password'])
+
+        others = Recipes.objects.exclude(author=user)
+        recipe = others.exclude(
+            Q(favourite__user_fav=user) | Q(shopcart__user_cart=user)
+        ).order_by('-pk').first() or others.order_by('-pk').first()
+        if recipe is None:
+            raise CommandError('Нужны рецепты хотя бы двух авторов')
+        author = recipe.author
+        following = UsersFollowing.objects.filter(
+            follower=user, following=author, is_follow=True)
+        if following.exists():
+            author = User.objects.exclude(pk=user.pk).exclude(
+                following__follower=user, following__is_follow=True
+            ).order_by('pk').first() or author
+
+        return {
+            'user': user,
+            'token': Token.objects.get_or_create(user=user)[0].key,
+            'own_recipe': user.recipes.order_by('-pk').first(),
+            'recipe': recipe,
+            'author': author,
+            'recipe_ids': list(others.order_by('-pk').values_list(
+                'pk', flat=True)[:20]),
+            'author_ids': list(User.objects.exclude(pk=user.pk).order_by(
+                '-pk').values_list('pk', flat=True)[:20]),
+            'tags': list(Tags.objects.values_list('slug', flat=True)[:2]),
+            'ingredient': Ingredients.objects.order_by('pk').first(),
+            'image': get_image_payload(),
+        }
+
+    def get_request(self, name: str, method: str, detail: bool,
+                    fixtures: Dict) -> Tuple[str, Dict]:
+        user, recipe = fixtures['user'], fixtures['recipe']
+        basename = name.split('-')[0]
+        kwargs = {}
+        if detail and basename == 'recipes':
+            own = name == 'recipes-detail' and method != 'get'
+            kwargs['pk'] = (fixtures['own_recipe'] if own else recipe).pk
+        elif detail and basename == 'users':
+            kwargs['pk'] = fixtures['author'].pk
+        elif detail and basename == 'ingredients':
+            kwargs['pk'] = fixtures['ingredient'].pk
+        elif detail and basename == 'tags':
+            kwargs['pk'] = Tags.objects.order_by('pk').first().pk
+
+        if name in ('login', 'logout'):
+            url = reverse(f'api:{name}')
+        else:
+            url = reverse(f'api:{name}', kwargs=kwargs)
+
+        recipe_data = {
+            'tags': list(Tags.objects.values_list('pk', flat=True)[:2]),
+            'ingredients': [{'id': fixtures['ingredient'].pk, 'amount': 10}],
+            'image': fixtures['image'],
+            'name': 'Бенчмарк',
+            'text': 'Рецепт для бенчмарка',
+            'cooking_time': 10,
+        }
+        data = {
+            ('recipes-list', 'post'): recipe_data,
+            ('recipes-detail', 'patch'): recipe_data,
+            ('users-list', 'post'): {
+                'email': 'signup@example.com', 'username': 'signup',
+                'first_name': 'Имя', 'last_name': 'Фамилия',
+                'password': GENERATED_PASSWORD,
+            },
+            ('users-update-password', 'post'): {
+                'current_password': GENERATED_PASSWORD,
+                'new_password': f'{GENERATED_PASSWORD}-new',
+            },
+            ('login', 'post'): {'email': user.email,
+                                'password': GENERATED_PASSWORD},
+        }.get((name, method), {})
+        if name in BULK_ROUTES:
+            data = {'ids': fixtures[BULK_ROUTES[name]]}
+        return url, data
+
+    def get_variants(self, name: str, method: str,
+                     fixtures: Dict) -> Dict[str, Dict]:
+        variants = {name: {}}
+        if method != 'get':
+            return variants
+        for suffix, params in ROUTE_VARIANTS.get(name, {}).items():
+            params = dict(params)
+            if params.get('tags') == 'tags':
+                params['tags'] = fixtures['tags']
+            variants[f'{name}[{suffix}]'] = params
+        return variants
+
+    def call(self, client: APIClient, method: str, url: str, data: Dict,
+             params: Dict):
+        if method == 'get':
+            return client.get(url, params)
+        return getattr(client, method)(url, data, format='json')
+
+    def measure(self, client: APIClient, method: str, url: str, data: Dict,
+                params: Dict, setup: bool, options) -> Dict:
+        timings, queries, sizes, statuses = [], [], [], set()
+        for number in range(options['warmup'] + options['repeat']):
+            if options['cold']:
+                cache.clear()
+            with transaction.atomic():
+                if setup:
+                    self.call(client, 'post', url, data, {})
+                with CaptureQueriesContext(connection) as captured:
+                    start = perf_counter()
+                    response = self.call(client, method, url, data, params)
+                    elapsed = perf_counter() - start
+                transaction.set_rollback(True)
+            if number < options['warmup']:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+            sizes.append(len(content))
+            statuses.add(response.status_code)
+
+        timings.sort()
+        return {
+            'method': method.upper(),
+            'url': url,
+            'p50_ms': round(median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1,
+                                        int(len(timings) * 0.95))], 3),
+            'queries': int(median(queries)),
+            'bytes': int(median(sizes)),
+            'status': sorted(statuses),
+        }
+
+    def compare(self, results: Dict, path: Path, partial: bool):
+        previous = json.loads(path.read_text(encoding='utf-8'))['routes']
+        self.stdout.write(f'\nСравнение с {path}:')
+        for key, result in results.items():
+            before = previous.get(key)
+            if before is None:
+                self.stdout.write(f'{key:<48} новый маршрут')
+                continue
+            delta = result['p50_ms'] - before['p50_ms']
+            percent = delta / max(before['p50_ms'], 1e-9) * 100
+            line = (f'{key:<48} p50 {delta:+9.2f} ms ({percent:+6.1f}%) '
+                    f'queries {result["queries"] - before["queries"]:+4} '
+                    f'bytes {result["bytes"] - before["bytes"]:+8}')
+            style = self.style.WARNING if percent > 20 else str
+            self.stdout.write(style(line))
+        if partial:
+            return
+        for key in previous.keys() - results.keys():
+            self.stdout.write(f'{key:<48} маршрут удалён')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля')
+
+        fixtures = self.get_fixtures()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {fixtures["token"]}')
+        results = {}
+
+        with TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, ALLOWED_HOSTS=['*']
+        ):
+            for name, method, detail in self.get_routes():
+                if options['route'] and not name.startswith(
+                        tuple(options['route'])):
+                    continue
+                url, data = self.get_request(name, method, detail, fixtures)
+                setup = method == 'delete' and name != 'recipes-detail'
+                for key, params in self.get_variants(name, method,
+                                                     fixtures).items():
+                    result = self.measure(client, method, url, data, params,
+                                          setup, options)
+                    results[f'{method.upper()} {key}'] = result
+                    self.stdout.write(
+                        f'{method.upper() + " " + key:<48} '
+                        f'p50 {result["p50_ms"]:9.2f} ms '
+                        f'p95 {result["p95_ms"]:9.2f} ms '
+                        f'{result["queries"]:4} queries '
+                        f'{result["bytes"]:8} bytes {result["status"]}'
+                    )
+
+        report = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'vendor': connection.vendor,
+                'repeat': options['repeat'],
+                'cold': options['cold'],
+                'users': User.objects.count(),
+                'recipes': Recipes.objects.count(),
+                'favorites': FavoriteRecipes.objects.count(),
+                'cart': ShoppingCart.objects.count(),
+                'follows': UsersFollowing.objects.count(),
+            },
+            'routes': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8')
+        if options['compare']:
+            self.compare(results, Path(options['compare']),
+                         bool(options['route']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено маршрутов: {len(results)}'))
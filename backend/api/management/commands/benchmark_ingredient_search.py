@@ -0,0 +1,60 @@
+from statistics import median
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Callable, List
+
+from django.core.management.base import BaseCommand
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import IngredientsSerializer
+from api.utils.ingredient_search import ingredient_search_index
+from recipes.models import Ingredients
+
+DEFAULT_QUERIES: List[str] = ['а', 'мо', 'сыр', 'соус', 'масло', 'ик', 'ное']
+
+
+def search_filter_ingredients(query: str) -> list:
+    request = Request(APIRequestFactory().get('/api/ingredients/',
+                                              {'search': query}))
+    queryset = SearchFilter().filter_queryset(
+        request, Ingredients.objects.all(),
+        SimpleNamespace(search_fields=['name'])
+    )
+    return IngredientsSerializer(queryset, many=True).data
+
+
+def index_ingredients(query: str) -> list:
+    return ingredient_search_index.search(query)
+
+
+class Command(BaseCommand):
+    help = 'compare SearchFilter and in-memory ingredient search latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def measure(self, func: Callable, query: str, repeat: int):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            result = func(query)
+            timings.append(perf_counter() - start)
+        return len(result), median(timings) * 1000
+
+    def handle(self, *args, **options):
+
+        ingredient_search_index.get_index()
+
+        for query in options['queries']:
+            for name, func in (('search_filter', search_filter_ingredients),
+                               ('index', index_ingredients)):
+                found, timing = self.measure(func, query, options['repeat'])
+                self.stdout.write(
+                    f'{query:<10} {name:<14} {timing:8.3f} ms {found:6} found'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Поиск по {Ingredients.objects.count()} ингредиентам проверен!'))
@@ -0,0 +1,96 @@
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.serializers import RecipeGetSerializer
+from api.utils.recipe_values import serialize_recipes
+from recipes.models import Recipes
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'compare the recipe read serializer with the values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100,
+                            help='recipes serialized per run')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--user', type=int, default=None,
+                            help='serialize for this user id')
+        parser.add_argument('--anonymous', action='store_true')
+
+    def get_request(self, options) -> Request:
+        request = APIRequestFactory().get('/api/recipes/')
+        if options['anonymous']:
+            user = AnonymousUser()
+        elif options['user']:
+            user = User.objects.filter(pk=options['user']).first()
+        else:
+            user = User.objects.filter(
+                favourite__isnull=False).order_by('pk').first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        force_authenticate(request, user)
+        return Request(request)
+
+    def measure(self, serialize: Callable, repeat: int) -> Dict:
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            serialize()
+            timings.append(perf_counter() - start)
+        return {'p50_ms': median(timings) * 1000,
+                'min_ms': min(timings) * 1000}
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1 or options['repeat'] < 1:
+            raise CommandError('--limit и --repeat должны быть больше нуля')
+
+        request = self.get_request(options)
+        recipe_ids = list(Recipes.objects.values_list(
+            'pk', flat=True)[:options['limit']])
+        if not recipe_ids:
+            raise CommandError('Нет данных, запустите generate_data')
+        queryset = Recipes.objects.filter(pk__in=recipe_ids).with_related(
+        ).with_user_flags(request.user)
+
+        def serialize_model():
+            return RecipeGetSerializer(
+                queryset.all(), many=True, context={'request': request}
+            ).data
+
+        def serialize_values():
+            return serialize_recipes(queryset.all(), request)
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            renderer = JSONRenderer()
+            if (renderer.render(serialize_model())
+                    != renderer.render(serialize_values())):
+                raise CommandError('Быстрый сериализатор отдаёт другой JSON')
+
+            results = {
+                'RecipeGetSerializer': self.measure(serialize_model,
+                                                    options['repeat']),
+                'serialize_recipes': self.measure(serialize_values,
+                                                  options['repeat']),
+            }
+
+        for name, result in results.items():
+            per_second = len(recipe_ids) / result['p50_ms'] * 1000
+            self.stdout.write(
+                f'{name:<20} p50 {result["p50_ms"]:9.2f} ms '
+                f'min {result["min_ms"]:9.2f} ms '
+                f'{per_second:10.0f} objects/s'
+            )
+        speedup = (results['RecipeGetSerializer']['p50_ms']
+                   / results['serialize_recipes']['p50_ms'])
+        self.stdout.write(self.style.SUCCESS(
+            f'JSON совпадает, ускорение x{speedup:.1f} '
+            f'на {len(recipe_ids)} рецептах'))
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from statistics import median
+from subprocess import DEVNULL, Popen
+from time import monotonic, perf_counter, sleep
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Recipes
+from users.models import User
+
+SERVER_PROFILES = ('wsgi', 'asgi')
+SERVER_HOST = '127.0.0.1'
+SERVER_START_TIMEOUT = 30
+BENCHMARK_PATHS: Tuple[str, ...] = (
+    '/api/tags/',
+    '/api/ingredients/?name=сол',
+    '/api/recipes/',
+    '/api/recipes/{recipe}/',
+    '/api/users/me/',
+)
+
+
+def get_percentile(values: List[float], percentile: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def fetch(port: int, path: str, token: str) -> int:
+    reader, writer = await asyncio.open_connection(SERVER_HOST, port)
+    try:
+        writer.write((
+            f'GET {path} HTTP/1.1\r\nHost: {SERVER_HOST}\r\n'
+            f'Authorization: Token {token}\r\n'
+            'Accept: application/json\r\nConnection: close\r\n\r\n'
+        ).encode())
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load(port: int, paths: List[str], token: str,
+                   concurrency: int, duration: float) -> Dict:
+    timings: List[float] = []
+    errors = 0
+    deadline = monotonic() + duration
+
+    async def worker(offset: int):
+        nonlocal errors
+        number = offset
+        while monotonic() < deadline:
+            path = paths[number % len(paths)]
+            number += 1
+            start = perf_counter()
+            try:
+                status = await fetch(port, path, token)
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status != 200:
+                errors += 1
+                continue
+            timings.append((perf_counter() - start) * 1000)
+
+    start = perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    timings.sort()
+    if not timings:
+        return {'requests': 0, 'errors': errors, 'rps': 0.0}
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(median(timings), 3),
+        'p95_ms': round(get_percentile(timings, 0.95), 3),
+        'p99_ms': round(get_percentile(timings, 0.99), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = 'compare WSGI and ASGI deployments under concurrent read load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append',
+                            choices=SERVER_PROFILES, default=None)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, action='append',
+                            default=None)
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--warmup', type=float, default=2.0)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--path', action='append', default=None,
+                            help='request this path instead of the defaults')
+        parser.add_argument('--output', type=Path, default=None,
+                            help='write results to this JSON file')
+
+    def get_fixtures(self) -> Tuple[List[str], str]:
+        user = User.objects.filter(
+            recipes__isnull=False).order_by('pk').first()
+        recipe = Recipes.objects.order_by('-pk').first()
+        if user is None or recipe is None:
+            raise CommandError('Нет данных, запустите generate_data')
+        paths = [quote(path.format(recipe=recipe.pk), safe='/?=&')
+                 for path in self.options['path'] or BENCHMARK_PATHS]
+        return paths, Token.objects.get_or_create(user=user)[0].key
+
+    def start_server(self, profile: str) -> Popen:
+        env = {
+            **os.environ,
+            'SERVER_PROFILE': profile,
+            'ASYNC_READ_VIEWS': str(profile == 'asgi'),
+            'PYTHONPATH': os.pathsep.join(path for path in sys.path if path),
+        }
+        output = None if self.options['verbosity'] > 1 else DEVNULL
+        server = Popen([
+            sys.executable, '-m', 'gunicorn',
+            '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+            '--chdir', str(settings.BASE_DIR),
+            '--bind', f'{SERVER_HOST}:{self.options["port"]}',
+            '--workers', str(self.options['workers']),
+        ], env=env, stdout=output, stderr=output)
+
+        deadline = monotonic() + SERVER_START_TIMEOUT
+        while monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Сервер {profile} не запустился')
+            try:
+                socket.create_connection(
+                    (SERVER_HOST, self.options['port']), timeout=1).close()
+                return server
+            except OSError:
+                sleep(0.2)
+        server.terminate()
+        raise CommandError(f'Сервер {profile} не ответил за '
+                           f'{SERVER_START_TIMEOUT} с')
+
+    def benchmark(self, profile: str, paths: List[str], token: str,
+                  concurrency: int) -> Dict:
+        server = self.start_server(profile)
+        try:
+            asyncio.run(run_load(self.options['port'], paths, token,
+                                 concurrency, self.options['warmup']))
+            return asyncio.run(run_load(self.options['port'], paths, token,
+                                        concurrency,
+                                        self.options['duration']))
+        finally:
+            server.terminate()
+            server.wait()
+
+    def handle(self, *args, **options):
+        self.options = options
+        if options['workers'] < 1 or options['duration'] <= 0:
+            raise CommandError('--workers и --duration должны быть больше '
+                               'нуля')
+
+        paths, token = self.get_fixtures()
+        results = {}
+        for concurrency in options['concurrency'] or [32]:
+            for profile in options['profile'] or SERVER_PROFILES:
+                result = self.benchmark(profile, paths, token, concurrency)
+                results[f'{profile} c={concurrency}'] = result
+                self.stdout.write(
+                    f'{profile:<5} workers {options["workers"]:<3} '
+                    f'concurrency {concurrency:<4} '
+                    f'{result["rps"]:9.1f} rps '
+                    f'p50 {result.get("p50_ms", 0):9.2f} ms '
+                    f'p95 {result.get("p95_ms", 0):9.2f} ms '
+                    f'p99 {result.get("p99_ms", 0):9.2f} ms '
+                    f'errors {result["errors"]}'
+                )
+
+        if options['output']:
+            options['output'].write_text(json.dumps({
+                'workers': options['workers'],
+                'duration': options['duration'],
+                'paths': paths,
+                'results': results,
+            }, ensure_ascii=False, indent=2), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогонов выполнено: {len(results)}'))
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from random import randint, sample
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.utils.shopping_cart import get_shopping_cart_ingredients
+from recipes.models import (IngredientAmount, Ingredients, Recipes,
+                            ShoppingCart)
+from users.models import User
+
+
+def legacy_shopping_cart_ingredients(user) -> Dict[str, int]:
+    formated_ingredients: Dict[str, int] = defaultdict(int)
+    ingredients_amount_tuple = [
+        (shopcart.recipe_cart.ingredients.all(),
+         shopcart.recipe_cart.ingredientamount.all())
+        for shopcart in ShoppingCart.objects.filter(
+            user_cart=user, is_in_shopping_cart=True
+        )
+    ]
+
+    for (ingredients, ingredients_amount) in ingredients_amount_tuple:
+        for ingredient, ingredient_amount in zip(ingredients,
+                                                 ingredients_amount):
+            ingredient_str = (f'{ingredient.name} '
+                              f'({ingredient.measurement_unit}) -')
+            formated_ingredients[ingredient_str] += ingredient_amount.amount
+    return formated_ingredients
+
+
+def aggregated_shopping_cart_ingredients(user) -> Dict[str, int]:
+    return {
+        f"{ingredient['name']} ({ingredient['measurement_unit']}) -":
+        ingredient['total_amount']
+        for ingredient in get_shopping_cart_ingredients(user)
+    }
+
+
+class Command(BaseCommand):
+    help = 'compare legacy and aggregated shopping cart ingredient queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--ingredients', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def populate_cart(self, recipes_count: int,
+                      ingredients_per_recipe: int) -> User:
+        user = User.objects.create_user(
+            username='benchmark_cart', email='benchmark_cart@foodgram.bench',
+            first_name='benchmark', last_name='cart', password='benchmark'
+        )
+        ingredients = Ingredients.objects.bulk_create(
+            [Ingredients(name=f'benchmark ingredient {number}',
+                         measurement_unit='г')
+             for number in range(ingredients_per_recipe * 5)]
+        )
+        recipes = Recipes.objects.bulk_create(
+            [Recipes(author=user, name=f'benchmark recipe {number}',
+                     text='benchmark', image='', cooking_time=1)
+             for number in range(recipes_count)]
+        )
+        IngredientAmount.objects.bulk_create(
+            [IngredientAmount(recipe=recipe, ingredient=ingredient,
+                              amount=randint(1, 500))
+             for recipe in recipes
+             for ingredient in sample(ingredients, ingredients_per_recipe)]
+        )
+        ShoppingCart.objects.bulk_create(
+            [ShoppingCart(user_cart=user, recipe_cart=recipe,
+                          is_in_shopping_cart=True)
+             for recipe in recipes]
+        )
+        return user
+
+    def measure(self, func: Callable, user, repeat: int):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = perf_counter()
+                result = func(user)
+                timings.append(perf_counter() - start)
+        return result, median(timings) * 1000, len(queries)
+
+    def handle(self, *args, **options):
+
+        with transaction.atomic():
+            user = self.populate_cart(options['recipes'],
+                                      options['ingredients'])
+            results = {}
+
+            for name, func in (
+                ('legacy', legacy_shopping_cart_ingredients),
+                ('aggregated', aggregated_shopping_cart_ingredients),
+            ):
+                result, timing, queries = self.measure(func, user,
+                                                       options['repeat'])
+                results[name] = result
+                self.stdout.write(
+                    f'{name:<12} {timing:10.2f} ms {queries:6} queries '
+                    f'{len(result):6} lines'
+                )
+
+            transaction.set_rollback(True)
+
+        if results['legacy'] != results['aggregated']:
+            self.stdout.write(self.style.WARNING(
+                'Legacy totals differ from the aggregated totals'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Корзина из {options["recipes"]} рецептов проверена!'))
@@ -0,0 +1,72 @@
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from time import perf_counter
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api.utils.metrics import (RequestTimings, request_metrics,
+                               request_timings)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    @contextmanager
+    def track(self):
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            request_timings.reset(token)
+
+    def finish(self, request, response, timings: RequestTimings):
+        timings.finish()
+        request_metrics.observe(self.get_route(request), request.method,
+                                response.status_code, timings)
+        response['Server-Timing'] = timings.server_timing()
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.track() as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        with self.track() as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def start_view(self):
+        timings = request_timings.get()
+        if timings is not None:
+            timings.view_start = perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    async def aprocess_view(self, request, view_func, view_args,
+                            view_kwargs):
+        self.start_view()
+
+    def get_route(self, request) -> str:
+        match = request.resolver_match
+        if match is None:
+            return 'unmatched'
+        if match.app_name == 'api':
+            return match.url_name
+        return match.view_name
@@ -1,10 +1,13 @@
 from collections import defaultdict
+from typing import Dict, List
 
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.utils.images import ImageVariantsField, schedule_image_variants
 from recipes.models import IngredientAmount, Ingredients, Recipes, Tags
 from users.models import User, UsersFollowing
 
@@ -12,11 +15,13 @@ from users.models import User, UsersFollowing
 class UserRecipeSerializer(serializers.ModelSerializer):
 
     image = Base64ImageField(use_url=True, label='Картинка')
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipes
-        fields = ['id', 'name', 'image', 'cooking_time', ]
-        read_only_fields = ('id', 'name', 'image', 'cooking_time', )
+        fields = ['id', 'name', 'image', 'image_variants', 'cooking_time', ]
+        read_only_fields = ('id', 'name', 'image', 'image_variants',
+                            'cooking_time', )
 
 
 class UserSerializer(UserCreateSerializer):
@@ -25,6 +30,8 @@ class UserSerializer(UserCreateSerializer):
     password = serializers.CharField(write_only=True, label=('Пароль'))
 
     def get_is_subscribed(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            return instance.is_subscribed
         if not self.context['request'].user.is_anonymous:
             return UsersFollowing.objects.filter(
                 follower=self.context['request'].user,
@@ -51,23 +58,30 @@ class UserPasswordSerializer(serializers.Serializer):
         return value
 
 
+class BulkIdsSerializer(serializers.Serializer):
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=500
+    )
+
+
 class UserFavouriteSerializer(serializers.ModelSerializer):
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, instance):
-        return UsersFollowing.objects.filter(follower=self.context,
-                                             following=instance,
-                                             is_follow=True).exists()
+        if hasattr(instance, 'is_subscribed'):
+            return instance.is_subscribed
+        return UsersFollowing.objects.filter(
+            follower=self.context['request'].user,
+            following=instance,
+            is_follow=True
+        ).exists()
 
     def get_recipes(self, instance):
-        return UserRecipeSerializer(Recipes.objects.filter(author=instance),
-                                    many=True).data
-
-    def get_recipes_count(self, instance):
-        return Recipes.objects.filter(author=instance).count()
+        return UserRecipeSerializer(instance.recipes.all(), many=True).data
 
     class Meta:
         model = User
@@ -94,13 +108,60 @@ class IngredientsSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'name', 'measurement_unit',)
 
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        ids = []
+        for pk in data:
+            if isinstance(pk, bool):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+            try:
+                ids.append(int(pk))
+            except (TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+
+        objects = child.get_queryset().in_bulk(set(ids))
+        for pk in ids:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in ids]
+
+
+class IngredientAmountListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        ingredient_data = super().to_internal_value(data)
+        ingredients = Ingredients.objects.in_bulk(
+            {ingredient['id'] for ingredient in ingredient_data})
+
+        errors = [
+            {} if ingredient['id'] in ingredients else
+            {'id': [serializers.PrimaryKeyRelatedField.default_error_messages[
+                'does_not_exist'].format(pk_value=ingredient['id'])]}
+            for ingredient in ingredient_data
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for ingredient in ingredient_data:
+            ingredient['id'] = ingredients[ingredient['id']]
+        return ingredient_data
+
+
 class IngredientAmountRecipePostSerializer(serializers.ModelSerializer):
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredients.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = IngredientAmount
         fields = ('id', 'amount',)
+        list_serializer_class = IngredientAmountListSerializer
 
     def to_representation(self, instance):
 
@@ -115,7 +176,9 @@ class RecipeGetSerializer(serializers.ModelSerializer):
 
     tags = TagsSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
+    ingredients = serializers.SerializerMethodField()
     image = Base64ImageField(use_url=True, label='Картинка')
+    image_variants = ImageVariantsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -123,20 +186,24 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         model = Recipes
         fields = [
             'id', 'tags', 'ingredients', 'author', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time',
+            'is_in_shopping_cart', 'name', 'image', 'image_variants', 'text',
+            'cooking_time',
         ]
         read_only_fields = (
             'id', 'tags', 'ingredients', 'author', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time',
+            'is_in_shopping_cart', 'name', 'image', 'image_variants', 'text',
+            'cooking_time',
         )
 
     def to_representation(self, instance):
-        representation = super().to_representation(instance)
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
 
+    def get_ingredients(self, instance):
         ingredients_with_amount = []
 
-        for ingredient_amount in instance.ingredientamount.all(
-        ).prefetch_related('ingredient'):
+        for ingredient_amount in instance.ingredientamount.all():
             ingredient = ingredient_amount.ingredient
             ingredients_with_amount.append({
                 'id': ingredient.id,
@@ -145,10 +212,11 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                 'amount': ingredient_amount.amount
             })
 
-        representation['ingredients'] = ingredients_with_amount
-        return representation
+        return ingredients_with_amount
 
     def get_is_favorited(self, object):
+        if hasattr(object, 'is_favorited'):
+            return object.is_favorited
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
@@ -156,6 +224,8 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                                        is_follow_rec=True).exists()
 
     def get_is_in_shopping_cart(self, object):
+        if hasattr(object, 'is_in_shopping_cart'):
+            return object.is_in_shopping_cart
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
@@ -166,6 +236,11 @@ class RecipeGetSerializer(serializers.ModelSerializer):
 class RecipePostSerializer(serializers.ModelSerializer):
 
     ingredients = IngredientAmountRecipePostSerializer(many=True)
+    tags = BulkManyRelatedField(
+        child_relation=serializers.PrimaryKeyRelatedField(
+            queryset=Tags.objects.all()),
+        allow_empty=False, label='Теги'
+    )
     image = Base64ImageField(use_url=True, label='Картинка')
 
     class Meta:
@@ -173,44 +248,64 @@ class RecipePostSerializer(serializers.ModelSerializer):
         fields = ['id', 'tags', 'ingredients', 'image',
                   'name', 'text', 'cooking_time', ]
 
+    def get_ingredient_amounts(self, ingredient_data: List[Dict]
+                               ) -> Dict[int, int]:
+        formated_ingredients = defaultdict(int)
+        for ingredient in ingredient_data:
+            formated_ingredients[ingredient['id'].id] += ingredient['amount']
+        return formated_ingredients
+
+    def update_ingredients(self, recipe, ingredient_data: List[Dict]):
+        amounts = self.get_ingredient_amounts(ingredient_data)
+        current = {ingredient_amount.ingredient_id: ingredient_amount
+                   for ingredient_amount in recipe.ingredientamount.all()}
+
+        removed = current.keys() - amounts.keys()
+        if removed:
+            recipe.ingredientamount.filter(
+                ingredient_id__in=removed).delete()
+
+        changed = []
+        for ingredient_id, ingredient_amount in current.items():
+            amount = amounts.get(ingredient_id, ingredient_amount.amount)
+            if amount != ingredient_amount.amount:
+                ingredient_amount.amount = amount
+                changed.append(ingredient_amount)
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ['amount'])
+
+        added = [
+            IngredientAmount(ingredient_id=ingredient_id, recipe=recipe,
+                             amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        ]
+        if added:
+            IngredientAmount.objects.bulk_create(added)
+
     @transaction.atomic
     def update(self, instance, validated_data):
 
-        self.is_valid(raise_exception=True)
-
+        if 'image' in validated_data:
+            instance.image = validated_data['image']
+            instance.image_variants = {}
+            schedule_image_variants(instance)
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
         instance.cooking_time = validated_data.get('cooking_time',
                                                    instance.cooking_time)
-        ingredient_data = validated_data.get('ingredients')
-        tags_data = validated_data.get('tags')
-        formated_ingredients = defaultdict(int)
-
-        instance.tags.set(tags_data)
 
-        instance.ingredientamount.all().delete()
+        if 'tags' in validated_data:
+            instance.tags.set(validated_data['tags'])
+        if 'ingredients' in validated_data:
+            self.update_ingredients(instance, validated_data['ingredients'])
 
-        for ingredient in ingredient_data:
-            formated_ingredients[ingredient['id']] += ingredient['amount']
-
-        IngredientAmount.objects.bulk_create(
-            [IngredientAmount(
-                ingredient=ingredient,
-                recipe=instance,
-                amount=ingredient_amount
-            )
-                for ingredient, ingredient_amount
-                in formated_ingredients.items()]
-        )
         instance.save()
         return instance
 
     @transaction.atomic
     def create(self, validated_data):
 
-        self.is_valid(raise_exception=True)
-
-        formated_ingredients = defaultdict(int)
         ingredient_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
 
@@ -219,26 +314,32 @@ class RecipePostSerializer(serializers.ModelSerializer):
         )
 
         recipe.tags.set(tags_data)
-
-        for ingredient in ingredient_data:
-            formated_ingredients[ingredient['id']] += ingredient['amount']
+        schedule_image_variants(recipe)
 
         IngredientAmount.objects.bulk_create(
             [IngredientAmount(
-                ingredient=ingredient,
+                ingredient_id=ingredient_id,
                 recipe=recipe,
                 amount=ingredient_amount
             )
-                for ingredient, ingredient_amount
-                in formated_ingredients.items()]
+                for ingredient_id, ingredient_amount
+                in self.get_ingredient_amounts(ingredient_data).items()]
         )
         return recipe
 
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], Prefetch(
+            'ingredients__ingredientamount',
+            queryset=IngredientAmount.objects.filter(recipe=instance)
+        ))
+        return super().to_representation(instance)
+
 
 class RecipeFavoriteSerializer(serializers.ModelSerializer):
 
     image = Base64ImageField(use_url=True, label='Картинка')
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipes
-        fields = ['name', 'image', 'text', 'cooking_time', ]
+        fields = ['name', 'image', 'image_variants', 'text', 'cooking_time', ]
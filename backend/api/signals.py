@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.utils.catalog import bump_catalog_version
+from api.utils.feed import schedule_fan_out
+from api.utils.search import set_search_vector, update_search_index
+from api.utils.counters import (RECIPES_COUNTER, TOGGLE_COUNTERS,
+                                change_counter)
+from api.utils.token_cache import token_cache
+from recipes.models import (FavoriteRecipes, IngredientAmount, Ingredients,
+                            Recipes, ShoppingCart, Tags)
+from users.models import User, UsersFollowing
+
+AUTHOR_FIELDS = {'username', 'email', 'first_name', 'last_name'}
+
+
+@receiver([post_save, post_delete], sender=Ingredients)
+@receiver([post_save, post_delete], sender=Tags)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_catalog_version(sender))
+
+
+@receiver([post_save, post_delete], sender=Recipes)
+@receiver([post_save, post_delete], sender=IngredientAmount)
+@receiver(post_delete, sender=User)
+@receiver(m2m_changed, sender=Recipes.tags.through)
+def recipes_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_catalog_version(Recipes))
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None
+                        or AUTHOR_FIELDS & set(update_fields)):
+        recipes_changed(sender)
+
+
+@receiver(post_save, sender=Recipes)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(RECIPES_COUNTER, [instance.author_id], 1)
+        schedule_fan_out(instance)
+
+
+@receiver(pre_save, sender=Recipes)
+def recipe_saving(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is None:
+        set_search_vector(instance, using)
+
+
+@receiver(post_save, sender=Recipes)
+def recipe_saved(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and {'name', 'text'} & set(update_fields):
+        update_search_index([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Recipes)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(RECIPES_COUNTER, [instance.author_id], -1)
+
+
+@receiver(post_delete, sender=FavoriteRecipes)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=UsersFollowing)
+def toggle_deleted(sender, instance, **kwargs):
+    counter = TOGGLE_COUNTERS[sender]
+    if getattr(instance, counter.flag_field):
+        change_counter(
+            counter, [getattr(instance, f'{counter.source_field}_id')], -1)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate([instance.key], [instance.user_id])
+    transaction.on_commit(
+        lambda: token_cache.invalidate([instance.key], [instance.user_id]))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created and set(update_fields or ()) != {'last_login'}:
+        token_cache.invalidate_user(instance.pk)
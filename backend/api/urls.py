@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.async_views import get_async_urlpatterns
 from api.views import (IngredientsViewset, RecipsViewset, TagsViewset,
-                       UsersViewset)
+                       UsersViewset, metrics)
 
 app_name = 'api'
 
@@ -16,4 +18,8 @@ router_v1.register('tags', TagsViewset, basename='tags')
 urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', metrics, name='metrics'),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = get_async_urlpatterns(router_v1) + urlpatterns
@@ -0,0 +1,75 @@
+from typing import Dict, List, Set, Type
+
+from django.db import models, transaction
+
+from api.utils.counters import (TOGGLE_COUNTERS, Counter, change_counter,
+                                get_actual_count, get_toggle_values)
+
+BULK_ADDED = 'added'
+BULK_REMOVED = 'removed'
+BULK_UNCHANGED = 'unchanged'
+BULK_NOT_FOUND = 'not_found'
+BULK_FORBIDDEN = 'forbidden'
+
+
+def count_inserted(counter: Counter, target_ids: List[int]) -> Set[int]:
+    if not target_ids:
+        return set()
+    counts = counter.model.objects.filter(
+        pk__in=target_ids).select_for_update().annotate(
+        actual=get_actual_count(counter)
+    ).values_list('pk', counter.field, 'actual')
+    inserted = {pk for pk, current, actual in counts if actual > current}
+    counter.model.objects.filter(pk__in=inserted).update(
+        **{counter.field: get_actual_count(counter)})
+    return inserted
+
+
+@transaction.atomic
+def bulk_toggle(model: Type[models.Model], user_field: str, target_field: str,
+                flag_field: str, user, ids: List[int],
+                allowed: Dict[int, bool], add: bool) -> List[Dict]:
+    counter = TOGGLE_COUNTERS[model]
+    rows = model.objects.filter(**{user_field: user,
+                                   f'{target_field}__in': list(allowed)})
+    active = dict(rows.select_for_update().values_list(target_field,
+                                                       flag_field))
+    statuses = {}
+
+    for target_id in ids:
+        if target_id not in allowed:
+            statuses[target_id] = BULK_NOT_FOUND
+        elif add and not allowed[target_id]:
+            statuses[target_id] = BULK_FORBIDDEN
+        elif active.get(target_id, False) == add:
+            statuses[target_id] = BULK_UNCHANGED
+        else:
+            statuses[target_id] = BULK_ADDED if add else BULK_REMOVED
+
+    pending = [target_id for target_id, status in statuses.items()
+               if status in (BULK_ADDED, BULK_REMOVED)]
+    missing = [target_id for target_id in pending if target_id not in active]
+    model.objects.bulk_create([
+        model(**{user_field: user, f'{target_field}_id': target_id,
+                 flag_field: True})
+        for target_id in missing
+    ], ignore_conflicts=True)
+    inserted = count_inserted(counter, missing)
+
+    flipped = list(rows.filter(**{
+        f'{target_field}__in': [target_id for target_id in pending
+                                if target_id not in missing],
+        flag_field: not add,
+    }).select_for_update().values_list(target_field, flat=True))
+    if flipped:
+        rows.filter(**{f'{target_field}__in': flipped}).update(
+            **get_toggle_values(counter, add))
+    change_counter(counter, flipped, 1 if add else -1)
+
+    changed = inserted.union(flipped)
+    for target_id in pending:
+        if target_id not in changed:
+            statuses[target_id] = BULK_UNCHANGED
+
+    return [{'id': target_id, 'status': status}
+            for target_id, status in statuses.items()]
@@ -0,0 +1,107 @@
+from time import time_ns
+from typing import Callable, Dict, List, Tuple, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from rest_framework.response import Response
+
+from api.utils.replica import primary_reads
+
+CATALOG_VERSION_KEY = 'catalog_version:{model_name}'
+CATALOG_VALUES_KEY = 'catalog_values:{name}:{version}'
+
+
+def get_catalog_version_key(model: Type[models.Model]) -> str:
+    return CATALOG_VERSION_KEY.format(model_name=model._meta.model_name)
+
+
+def get_catalog_version(model: Type[models.Model]) -> int:
+    key = get_catalog_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_catalog_versions(catalog_models: Tuple[Type[models.Model], ...]
+                         ) -> List[int]:
+    versions = cache.get_many([get_catalog_version_key(model)
+                               for model in catalog_models])
+    return [versions.get(get_catalog_version_key(model))
+            or get_catalog_version(model) for model in catalog_models]
+
+
+async def aget_catalog_version(model: Type[models.Model]) -> int:
+    key = get_catalog_version_key(model)
+    version = await cache.aget(key)
+    if version is None:
+        version = time_ns()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+async def aget_catalog_versions(
+        catalog_models: Tuple[Type[models.Model], ...]) -> List[int]:
+    versions = await cache.aget_many([get_catalog_version_key(model)
+                                      for model in catalog_models])
+    return [versions.get(get_catalog_version_key(model))
+            or await aget_catalog_version(model) for model in catalog_models]
+
+
+def bump_catalog_version(model: Type[models.Model]) -> int:
+    version = time_ns()
+    cache.set(get_catalog_version_key(model), version, timeout=None)
+    return version
+
+
+def get_catalog_values(model: Type[models.Model], name: str,
+                       func: Callable):
+    with primary_reads():
+        return cache.get_or_set(
+            CATALOG_VALUES_KEY.format(name=name,
+                                      version=get_catalog_version(model)),
+            func, timeout=settings.CATALOG_CACHE_MAX_AGE
+        )
+
+
+def get_catalog_etag(model: Type[models.Model], version: int) -> str:
+    return f'"{model._meta.model_name}-{version}"'
+
+
+def patch_catalog_headers(response, etag: str):
+    response['ETag'] = etag
+    patch_cache_control(response, public=True,
+                        max_age=settings.CATALOG_CACHE_MAX_AGE)
+    patch_vary_headers(response, ('Accept', ))
+    return response
+
+
+class CatalogCacheMixin:
+
+    catalog_payloads: Dict[str, Tuple[int, list]] = {}
+
+    def get_catalog_payload(self, version: int) -> list:
+        model_name = self.queryset.model._meta.model_name
+        cached_version, payload = self.catalog_payloads.get(model_name,
+                                                            (None, None))
+        if cached_version != version:
+            with primary_reads():
+                payload = self.get_serializer(self.get_queryset(),
+                                              many=True).data
+            self.catalog_payloads[model_name] = (version, payload)
+        return payload
+
+    def list(self, request, *args, **kwargs):
+        version = get_catalog_version(self.queryset.model)
+        etag = get_catalog_etag(self.queryset.model, version)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(self.get_catalog_payload(version))
+        return patch_catalog_headers(response, etag)
@@ -0,0 +1,72 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Type
+
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from recipes.models import FavoriteRecipes, Recipes, ShoppingCart
+from users.models import User, UsersFollowing
+
+
+class Counter(NamedTuple):
+    model: Type[models.Model]
+    field: str
+    source: Type[models.Model]
+    source_field: str
+    flag_field: str
+    activated_field: Optional[str] = None
+
+
+TOGGLE_COUNTERS: Dict[Type[models.Model], Counter] = {
+    FavoriteRecipes: Counter(Recipes, 'favorites_count', FavoriteRecipes,
+                             'recipe_fav', 'is_follow_rec', 'activated_at'),
+    ShoppingCart: Counter(Recipes, 'carts_count', ShoppingCart,
+                          'recipe_cart', 'is_in_shopping_cart',
+                          'activated_at'),
+    UsersFollowing: Counter(User, 'followers_count', UsersFollowing,
+                            'following', 'is_follow'),
+}
+RECIPES_COUNTER = Counter(User, 'recipes_count', Recipes, 'author', None)
+COUNTERS = (*TOGGLE_COUNTERS.values(), RECIPES_COUNTER)
+
+
+def get_toggle_values(counter: Counter, value: bool) -> Dict:
+    values = {counter.flag_field: value}
+    if value and counter.activated_field:
+        values[counter.activated_field] = timezone.now()
+    return values
+
+
+def get_actual_count(counter: Counter) -> Coalesce:
+    rows = counter.source.objects.filter(
+        **{counter.source_field: OuterRef('pk')})
+    if counter.flag_field:
+        rows = rows.filter(**{counter.flag_field: True})
+    return Coalesce(Subquery(
+        rows.order_by().values(counter.source_field).annotate(
+            total=Count('pk')).values('total')
+    ), 0)
+
+
+def change_counter(counter: Counter, ids: Iterable[int], delta: int):
+    ids = list(ids)
+    if ids and delta:
+        counter.model.objects.filter(pk__in=ids).update(
+            **{counter.field: F(counter.field) + delta})
+
+
+@transaction.atomic
+def set_toggle(model: Type[models.Model], value: bool, **lookup) -> bool:
+    counter = TOGGLE_COUNTERS[model]
+    flag = counter.flag_field
+    changed = model.objects.filter(**lookup, **{flag: not value}).update(
+        **get_toggle_values(counter, value))
+    if value and not changed:
+        _, changed = model.objects.get_or_create(**lookup,
+                                                 defaults={flag: True})
+
+    if changed:
+        change_counter(counter, [lookup[counter.source_field].pk],
+                       1 if value else -1)
+    return bool(changed)
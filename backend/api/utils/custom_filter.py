@@ -1,7 +1,20 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from django.core.paginator import InvalidPage
+from django.db.models import Exists, OuterRef, Q
 from django_filters import rest_framework
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-from recipes.models import Recipes
+from api.utils.catalog import get_catalog_values
+from api.utils.search import search_recipes
+from recipes.models import Recipes, Tags
 
 
 class CustomRecipesPagination(PageNumberPagination):
@@ -9,26 +22,244 @@ class CustomRecipesPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     max_page_size = 100
     page_size = 6
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_ordering_message = 'Cursor is not supported with this ordering'
 
+    cursor_only = False
 
-class CustomFilterIsFavoritedIsShoppingCart(rest_framework.FilterSet):
+    def is_cursor_mode(self, request) -> bool:
+        return (self.cursor_only
+                or self.cursor_query_param in request.query_params)
+
+    def get_cursor_queryset(self, queryset, request):
+        self.request = request
+        ordering = tuple(queryset.query.order_by)
+        if ordering and ordering != tuple(self.cursor_ordering):
+            raise ValidationError(
+                {self.cursor_query_param: self.unsupported_ordering_message})
+        queryset = queryset.order_by(*self.cursor_ordering)
+        position = self.decode_cursor(request)
+
+        if position is not None:
+            created_at, pk = position
+            time_field, pk_field = self.get_cursor_fields()
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__lt': created_at})
+                | Q(**{f'{pk_field}__lt': pk}),
+                **{f'{time_field}__lte': created_at}
+            )
+        return queryset[:self.get_page_size(request) + 1]
+
+    def set_cursor_page(self, results: list, request) -> list:
+        page_size = self.get_page_size(request)
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        return self.set_cursor_page(
+            list(self.get_cursor_queryset(queryset, request)), request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if self.cursor_mode:
+            return self.set_cursor_page(
+                [row async for row in self.get_cursor_queryset(queryset,
+                                                               request)],
+                request
+            )
+
+        self.request = request
+        paginator = self.django_paginator_class(
+            queryset, self.get_page_size(request))
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row
+                                 in self.page.object_list]
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            self.encode_cursor(self.page[-1])
+        )
+
+    def get_cursor_fields(self) -> Tuple[str, str]:
+        time_field, pk_field = (field.lstrip('-')
+                                for field in self.cursor_ordering)
+        return time_field, pk_field
+
+    def get_cursor_value(self, recipe, field: str):
+        if isinstance(recipe, dict):
+            return recipe[field]
+        return getattr(recipe, field)
+
+    def encode_cursor(self, recipe):
+        time_field, pk_field = self.get_cursor_fields()
+        position = (
+            f'{self.get_cursor_value(recipe, time_field).isoformat()}|'
+            f'{self.get_cursor_value(recipe, pk_field)}'
+        )
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            created_at, pk = urlsafe_b64decode(
+                cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class FeedPagination(CustomRecipesPagination):
+    cursor_only = True
+
+
+class UsersPagination(LimitOffsetPagination):
+    cursor_query_param = 'cursor'
+    cursor_field = 'username'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
 
-    tags = rest_framework.AllValuesMultipleFilter(
-        field_name='tags__slug',
-        label='Теги'
+        self.request = request
+        self.limit = self.get_limit(request)
+        queryset = queryset.order_by(f'-{self.cursor_field}')
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(**{f'{self.cursor_field}__lt':
+                                          position})
+
+        results = list(queryset[:self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            remove_query_param(self.request.build_absolute_uri(),
+                               self.offset_query_param),
+            self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def encode_cursor(self, user) -> str:
+        return urlsafe_b64encode(
+            getattr(user, self.cursor_field).encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = urlsafe_b64decode(cursor.encode()).decode()
+        except (TypeError, ValueError):
+            position = None
+        if not position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+def get_tags_ids() -> Dict[str, int]:
+    return get_catalog_values(
+        Tags, 'tags_ids',
+        lambda: dict(Tags.objects.values_list('slug', 'id'))
     )
+
+
+def get_tags_choices() -> List[Tuple[str, str]]:
+    return [(slug, slug) for slug in get_tags_ids()]
+
+
+def get_authors_choices() -> List[Tuple[str, str]]:
+    return get_catalog_values(
+        Recipes, 'authors_ids',
+        lambda: [(str(author_id), str(author_id)) for author_id
+                 in Recipes.objects.values_list(
+                     'author_id', flat=True).order_by().distinct()]
+    )
+
+
+class CustomFilterIsFavoritedIsShoppingCart(rest_framework.FilterSet):
+
+    tags = rest_framework.MultipleChoiceFilter(
+        choices=get_tags_choices, method='get_tags', label='Теги')
     is_favorited = rest_framework.BooleanFilter(
         field_name='favourite', method='get_is_favorited', label='Избранное')
     is_in_shopping_cart = rest_framework.BooleanFilter(
         field_name='shopcart', method='get_is_in_shopping_cart',
         label='В корзине')
-    author = rest_framework.AllValuesMultipleFilter(
-        field_name='author__id', label='Автор')
+    author = rest_framework.MultipleChoiceFilter(
+        choices=get_authors_choices, method='get_author', label='Автор')
+    search = rest_framework.CharFilter(method='get_search', label='Поиск')
+    ordering = rest_framework.OrderingFilter(
+        fields=('favorites_count', 'carts_count', 'created_at'),
+        method='get_ordering', label='Сортировка')
 
     class Meta:
         model = Recipes
         fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.order_by(*value, '-id')
+
+    def get_tags(self, queryset, name, value):
+        tags_ids = get_tags_ids()
+        return queryset.filter(Exists(
+            Recipes.tags.through.objects.filter(
+                recipes=OuterRef('pk'),
+                tags__in=[tags_ids[slug] for slug in value]
+            )
+        ))
+
+    def get_author(self, queryset, name, value):
+        return queryset.filter(author__in=value)
+
     def get_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             return queryset.filter(
@@ -0,0 +1,129 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+
+from recipes.models import FeedEntry, FeedFanOut, Recipes
+from users.models import User, UsersFollowing
+
+FEED_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+feed_executor = ThreadPoolExecutor(
+    max_workers=settings.FEED_FANOUT_WORKERS,
+    thread_name_prefix='recipe-feed'
+)
+
+
+def get_following(user: User) -> QuerySet:
+    return UsersFollowing.objects.filter(follower=user, is_follow=True)
+
+
+def is_feed_materialized(user: User,
+                         following_count: Optional[int] = None) -> bool:
+    if following_count is None:
+        following_count = get_following(user).count()
+    return following_count <= settings.FEED_MAX_FOLLOWING
+
+
+def get_feed_queryset(user: User, recipes: QuerySet) -> QuerySet:
+    if is_feed_materialized(user):
+        return FeedEntry.objects.filter(user=user)
+    return recipes.filter(author__in=get_following(user).values('following'))
+
+
+def add_feed_entries(user_ids: Iterable[int], recipes: QuerySet):
+    recipes = list(recipes.values_list('pk', 'created_at'))
+    entries = [FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                         created_at=created_at)
+               for user_id in user_ids
+               for recipe_id, created_at in recipes]
+    FeedEntry.objects.bulk_create(entries, batch_size=FEED_BATCH_SIZE,
+                                  ignore_conflicts=True)
+
+
+def get_recent_recipes(author_ids: Iterable) -> QuerySet:
+    return Recipes.objects.filter(author__in=author_ids).order_by(
+        '-created_at', '-id')[:settings.FEED_BACKFILL_SIZE]
+
+
+def fan_out_recipe(recipe: Recipes):
+    followers = UsersFollowing.objects.filter(
+        following_id=recipe.author_id, is_follow=True
+    ).annotate(following_count=Subquery(
+        UsersFollowing.objects.filter(
+            follower=OuterRef('follower'), is_follow=True
+        ).order_by().values('follower').annotate(
+            total=Count('pk')).values('total')
+    )).filter(
+        following_count__lte=settings.FEED_MAX_FOLLOWING
+    ).values_list('follower_id', flat=True)
+
+    recipes = Recipes.objects.filter(pk=recipe.pk)
+    batch: List[int] = []
+    for follower_id in followers.iterator(chunk_size=FEED_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) == FEED_BATCH_SIZE:
+            add_feed_entries(batch, recipes)
+            batch = []
+    add_feed_entries(batch, recipes)
+
+
+def run_fan_out(recipe_id: int) -> bool:
+    try:
+        recipe = Recipes.objects.filter(pk=recipe_id).only(
+            'pk', 'author_id').first()
+        if recipe is not None:
+            fan_out_recipe(recipe)
+    except Exception:
+        logger.exception('Не удалось разослать рецепт %s в ленты', recipe_id)
+        return False
+    FeedFanOut.objects.filter(recipe_id=recipe_id).delete()
+    return True
+
+
+def fan_out_recipe_task(recipe_id: int):
+    try:
+        run_fan_out(recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_fan_out(recipe: Recipes) -> None:
+    FeedFanOut.objects.create(recipe=recipe)
+    transaction.on_commit(
+        lambda: feed_executor.submit(fan_out_recipe_task, recipe.pk)
+    )
+
+
+@transaction.atomic
+def rebuild_feed(user: User):
+    FeedEntry.objects.filter(user=user).delete()
+    if is_feed_materialized(user):
+        add_feed_entries([user.pk], get_recent_recipes(
+            get_following(user).values('following')))
+
+
+@transaction.atomic
+def follow_authors(user: User, author_ids: List[int]):
+    following_count = get_following(user).count()
+    if not is_feed_materialized(user, following_count):
+        if is_feed_materialized(user, following_count - len(author_ids)):
+            FeedEntry.objects.filter(user=user).delete()
+        return
+    add_feed_entries([user.pk], get_recent_recipes(author_ids))
+
+
+@transaction.atomic
+def unfollow_authors(user: User, author_ids: List[int]):
+    following_count = get_following(user).count()
+    if not is_feed_materialized(user, following_count + len(author_ids)):
+        if is_feed_materialized(user, following_count):
+            rebuild_feed(user)
+        return
+    FeedEntry.objects.filter(user=user,
+                             recipe__author__in=author_ids).delete()
@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+from rest_framework import serializers
+
+from api.utils.catalog import bump_catalog_version
+from recipes.models import Recipes
+
+IMAGE_VARIANTS: Dict[str, Tuple[int, int]] = {'card': (600, 600),
+                                              'thumbnail': (160, 160)}
+IMAGE_VARIANTS_DIR = 'recipes/images/variants'
+IMAGE_VARIANTS_QUALITY = 82
+
+logger = logging.getLogger(__name__)
+
+image_executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+
+
+def save_image_variant(image: Image.Image, name: str, image_format: str,
+                       **params) -> str:
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **params)
+    default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_image_variants(image_name: str) -> Dict[str, str]:
+    with default_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        image.load()
+
+    image_format = image.format if image.format in ('JPEG', 'PNG') else 'JPEG'
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    extension = 'jpg' if image_format == 'JPEG' else 'png'
+    stem = PurePosixPath(image_name).stem
+    variants = {}
+
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        name = f'{IMAGE_VARIANTS_DIR}/{stem}_{variant}'
+
+        variants[variant] = save_image_variant(
+            resized, f'{name}.{extension}', image_format,
+            optimize=True, quality=IMAGE_VARIANTS_QUALITY
+        )
+        variants[f'{variant}_webp'] = save_image_variant(
+            resized, f'{name}.webp', 'WEBP',
+            quality=IMAGE_VARIANTS_QUALITY, method=4
+        )
+    return variants
+
+
+def generate_image_variants(recipe_id: int) -> bool:
+    try:
+        image_name = Recipes.objects.filter(pk=recipe_id).values_list(
+            'image', flat=True).first()
+        if not image_name:
+            return False
+
+        updated = Recipes.objects.filter(pk=recipe_id,
+                                         image=image_name).update(
+            image_variants=build_image_variants(image_name)
+        )
+        if updated:
+            bump_catalog_version(Recipes)
+        return bool(updated)
+    finally:
+        connection.close()
+
+
+def generate_image_variants_task(recipe_id: int) -> bool:
+    try:
+        return generate_image_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось построить превью рецепта %s', recipe_id)
+        return False
+
+
+def schedule_image_variants(recipe: Recipes) -> None:
+    transaction.on_commit(
+        lambda: image_executor.submit(generate_image_variants_task,
+                                      recipe.pk)
+    )
+
+
+class ImageVariantsField(serializers.Field):
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+
+        for variant, name in (value or {}).items():
+            url = default_storage.url(name)
+            variants[variant] = (request.build_absolute_uri(url)
+                                 if request is not None else url)
+        return variants
@@ -0,0 +1,83 @@
+from array import array
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from api.utils.catalog import get_catalog_version
+from api.utils.replica import primary_reads
+from recipes.models import Ingredients
+
+TRIGRAM_SIZE = 3
+
+
+def get_trigrams(value: str) -> set:
+    return {value[index:index + TRIGRAM_SIZE]
+            for index in range(len(value) - TRIGRAM_SIZE + 1)}
+
+
+class IngredientSearchIndex:
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._index: Tuple[List[str], List[Dict], Dict[str, array]] = (
+            [], [], {})
+
+    def build(self, version: Optional[int] = None) -> None:
+        ingredients = sorted(
+            Ingredients.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda ingredient: (ingredient['name'].lower(),
+                                    ingredient['id'])
+        )
+        names = [ingredient['name'].lower() for ingredient in ingredients]
+        trigrams: Dict[str, array] = {}
+
+        for position, name in enumerate(names):
+            for trigram in get_trigrams(name):
+                trigrams.setdefault(trigram, array('I')).append(position)
+
+        self._index = (names, ingredients, trigrams)
+        self._version = version
+
+    def get_index(self):
+        version = get_catalog_version(Ingredients)
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    with primary_reads():
+                        self.build(version)
+        return self._index
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        names, ingredients, trigrams = self.get_index()
+        terms = query.replace(',', ' ').lower().split()
+        if not terms:
+            return ingredients[:limit]
+
+        prefix = ' '.join(terms)
+        start = bisect_left(names, prefix)
+        end = bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1),
+                          lo=start)
+        found = list(range(start, end))
+
+        if limit is None or len(found) < limit:
+            postings = sorted(
+                (trigrams.get(trigram, ()) for term in terms
+                 if len(term) >= TRIGRAM_SIZE
+                 for trigram in get_trigrams(term)), key=len
+            )
+            candidates = (sorted(set(postings[0]).intersection(*postings[1:]))
+                          if postings else range(len(names)))
+
+            for position in candidates:
+                if start <= position < end or not all(
+                        term in names[position] for term in terms):
+                    continue
+                found.append(position)
+                if limit is not None and len(found) >= limit:
+                    break
+
+        return [ingredients[position] for position in found[:limit]]
+
+
+ingredient_search_index = IngredientSearchIndex()
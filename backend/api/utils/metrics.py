@@ -0,0 +1,206 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from rest_framework.serializers import BaseSerializer
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DURATION_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                       0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS: Tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+TOKEN_CACHE_RESULTS: Tuple[str, ...] = ('local', 'shared', 'miss')
+
+
+class RequestTimings:
+    __slots__ = ('start', 'view_start', 'total', 'view', 'db', 'queries',
+                 'serializer', 'serializing')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.view_start = None
+        self.total = self.view = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.serializer = 0.0
+        self.serializing = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - start
+            self.queries += 1
+
+    def finish(self):
+        end = perf_counter()
+        self.total = end - self.start
+        if self.view_start is not None:
+            self.view = end - self.view_start
+
+    def server_timing(self) -> str:
+        return (f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+                f'serializer;dur={self.serializer * 1000:.1f}, '
+                f'view;dur={self.view * 1000:.1f}, '
+                f'total;dur={self.total * 1000:.1f}')
+
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    'request_timings', default=None)
+
+
+class Histogram:
+
+    def __init__(self, name: str, documentation: str,
+                 buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def expose(self, label_names: Tuple[str, ...]) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            label = ','.join(f'{name}="{value}"'
+                             for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label},le="{bucket}"}} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+class RequestMetrics:
+    label_names = ('route', 'method')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.token_cache = dict.fromkeys(TOKEN_CACHE_RESULTS, 0)
+        self.histograms = {
+            'total': Histogram('foodgram_request_duration_seconds',
+                               'Total request time.', DURATION_BUCKETS),
+            'view': Histogram('foodgram_view_duration_seconds',
+                              'Time spent in the view.', DURATION_BUCKETS),
+            'db': Histogram('foodgram_db_duration_seconds',
+                            'Time spent in SQL queries.', DURATION_BUCKETS),
+            'queries': Histogram('foodgram_db_queries',
+                                 'SQL queries per request.', QUERY_BUCKETS),
+            'serializer': Histogram('foodgram_serializer_duration_seconds',
+                                    'Time spent in serializers.',
+                                    DURATION_BUCKETS),
+        }
+
+    def observe(self, route: str, method: str, status: int,
+                timings: RequestTimings):
+        labels = (route, method)
+        with self.lock:
+            key = (route, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+            self.histograms['total'].observe(labels, timings.total)
+            self.histograms['view'].observe(labels, timings.view)
+            self.histograms['db'].observe(labels, timings.db)
+            self.histograms['queries'].observe(labels, timings.queries)
+            self.histograms['serializer'].observe(labels,
+                                                  timings.serializer)
+
+    def count_token_cache(self, result: str):
+        with self.lock:
+            self.token_cache[result] += 1
+
+    def expose_token_cache(self) -> List[str]:
+        lines = ['# HELP foodgram_token_cache_total Token authentication '
+                 'cache lookups by result.',
+                 '# TYPE foodgram_token_cache_total counter']
+        for result, count in self.token_cache.items():
+            lines.append(
+                f'foodgram_token_cache_total{{result="{result}"}} {count}')
+        lookups = sum(self.token_cache.values())
+        hits = lookups - self.token_cache['miss']
+        ratio = hits / lookups if lookups else 0
+        lines.extend([
+            '# HELP foodgram_token_cache_hit_ratio Share of token lookups '
+            'served from cache.',
+            '# TYPE foodgram_token_cache_hit_ratio gauge',
+            f'foodgram_token_cache_hit_ratio {ratio}',
+        ])
+        return lines
+
+    def expose(self) -> str:
+        lines = ['# HELP foodgram_responses_total Responses by status.',
+                 '# TYPE foodgram_responses_total counter']
+        with self.lock:
+            for (route, method, status), count in sorted(
+                    self.responses.items()):
+                lines.append(
+                    f'foodgram_responses_total{{route="{route}",'
+                    f'method="{method}",status="{status}"}} {count}')
+            for histogram in self.histograms.values():
+                lines.extend(histogram.expose(self.label_names))
+            lines.extend(self.expose_token_cache())
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def track_query(execute, sql, params, many, context):
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.execute_wrapper(execute, sql, params, many, context)
+
+
+def install_query_timing(connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+@contextmanager
+def serializer_timing():
+    timings = request_timings.get()
+    if timings is None or timings.serializing:
+        yield
+        return
+    timings.serializing = True
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer += perf_counter() - start
+        timings.serializing = False
+
+
+def time_serializer(serializer: BaseSerializer) -> BaseSerializer:
+    to_representation = serializer.to_representation
+
+    def timed_representation(instance):
+        with serializer_timing():
+            return to_representation(instance)
+
+    serializer.to_representation = timed_representation
+    return serializer
+
+
+class SerializerTimingMixin:
+
+    def get_serializer(self, *args, **kwargs):
+        return time_serializer(super().get_serializer(*args, **kwargs))
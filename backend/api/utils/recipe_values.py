@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+
+from api.utils.metrics import serializer_timing
+from recipes.models import IngredientAmount, Recipes
+
+RECIPE_VALUES = ('id', 'name', 'image', 'image_variants', 'text',
+                 'cooking_time', 'created_at',
+                 'is_favorited', 'is_in_shopping_cart',
+                 'author_is_subscribed', 'author_id', 'author__username',
+                 'author__email', 'author__first_name', 'author__last_name')
+TAG_VALUES = ('id', 'name', 'color', 'slug')
+INGREDIENT_VALUES = ('id', 'name', 'measurement_unit', 'amount')
+
+
+def get_file_url(name: str, request) -> str:
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def get_recipe_rows(queryset: QuerySet) -> QuerySet:
+    return queryset.prefetch_related(None).values(*RECIPE_VALUES)
+
+
+def get_tags_rows(recipe_ids: List[int]) -> QuerySet:
+    return Recipes.tags.through.objects.filter(
+        recipes_id__in=recipe_ids
+    ).order_by('tags__slug').values_list(
+        'recipes_id', 'tags_id', 'tags__name', 'tags__color', 'tags__slug'
+    )
+
+
+def get_ingredients_rows(recipe_ids: List[int]) -> QuerySet:
+    return IngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('pk').values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    )
+
+
+def group_by_recipe(rows: Iterable[Tuple], keys: Tuple[str, ...]
+                    ) -> Dict[int, List[Dict]]:
+    grouped = defaultdict(list)
+    for recipe_id, *values in rows:
+        grouped[recipe_id].append(dict(zip(keys, values)))
+    return grouped
+
+
+def build_recipes(rows: List[Dict], tags: Dict[int, List[Dict]],
+                  ingredients: Dict[int, List[Dict]],
+                  request) -> List[Dict]:
+    with serializer_timing():
+        return [{
+            'id': row['id'],
+            'tags': tags.get(row['id'], []),
+            'ingredients': ingredients.get(row['id'], []),
+            'author': {
+                'username': row['author__username'],
+                'email': row['author__email'],
+                'is_subscribed': row['author_is_subscribed'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'id': row['author_id'],
+            },
+            'is_favorited': row['is_favorited'],
+            'is_in_shopping_cart': row['is_in_shopping_cart'],
+            'name': row['name'],
+            'image': (get_file_url(row['image'], request)
+                      if row['image'] else None),
+            'image_variants': {
+                variant: get_file_url(name, request)
+                for variant, name in (row['image_variants'] or {}).items()
+            },
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+        } for row in rows]
+
+
+def serialize_recipe_rows(rows: Iterable[Dict], request) -> List[Dict]:
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    return build_recipes(
+        rows,
+        group_by_recipe(get_tags_rows(recipe_ids), TAG_VALUES),
+        group_by_recipe(get_ingredients_rows(recipe_ids), INGREDIENT_VALUES),
+        request
+    )
+
+
+def serialize_recipes(queryset: QuerySet, request) -> List[Dict]:
+    return serialize_recipe_rows(get_recipe_rows(queryset), request)
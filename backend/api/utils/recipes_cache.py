@@ -0,0 +1,72 @@
+from copy import deepcopy
+from hashlib import md5
+from typing import Tuple
+
+from api.utils.catalog import aget_catalog_versions, get_catalog_versions
+from recipes.models import Ingredients, Recipes, Tags
+
+RECIPES_LIST_CACHE_KEY = 'recipes_list:{version}:{params}'
+RECIPES_LIST_CACHE_PARAMS: Tuple[str, ...] = ('tags', 'author', 'page',
+                                              'limit', 'cursor', 'ordering',
+                                              'search')
+RECIPES_LIST_MODELS = (Recipes, Tags, Ingredients)
+RECIPES_LIST_USER_PARAMS: Tuple[str, ...] = ('is_favorited',
+                                             'is_in_shopping_cart')
+
+
+def is_recipes_list_cacheable(request) -> bool:
+    return not any(param in request.query_params
+                   for param in RECIPES_LIST_USER_PARAMS)
+
+
+def get_recipes_list_version() -> int:
+    return max(get_catalog_versions(RECIPES_LIST_MODELS))
+
+
+async def aget_recipes_list_version() -> int:
+    return max(await aget_catalog_versions(RECIPES_LIST_MODELS))
+
+
+def get_recipes_list_cache_key(request) -> str:
+    params = [request.build_absolute_uri('/')]
+    for param in RECIPES_LIST_CACHE_PARAMS:
+        if param not in request.query_params:
+            continue
+        values = sorted(set(request.query_params.getlist(param)))
+        params.append(f'{param}={",".join(values)}')
+
+    return RECIPES_LIST_CACHE_KEY.format(
+        version=get_recipes_list_version(),
+        params=md5('&'.join(params).encode()).hexdigest()
+    )
+
+
+def strip_user_flags(data: dict) -> dict:
+    data = deepcopy(data)
+    for recipe in data['results']:
+        recipe['is_favorited'] = False
+        recipe['is_in_shopping_cart'] = False
+        recipe['author']['is_subscribed'] = False
+    return data
+
+
+def overlay_user_flags(data: dict, user) -> dict:
+    if user.is_anonymous or not data['results']:
+        return data
+
+    flags = {
+        recipe_id: flag_values
+        for recipe_id, *flag_values in Recipes.objects.filter(
+            id__in=[recipe['id'] for recipe in data['results']]
+        ).with_user_flags(user).values_list(
+            'id', 'is_favorited', 'is_in_shopping_cart',
+            'author_is_subscribed'
+        ).order_by()
+    }
+
+    for recipe in data['results']:
+        if recipe['id'] not in flags:
+            continue
+        (recipe['is_favorited'], recipe['is_in_shopping_cart'],
+         recipe['author']['is_subscribed']) = flags[recipe['id']]
+    return data
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_PIN_KEY = 'replica_pin:{user_id}'
+
+replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+
+
+def has_replica() -> bool:
+    return settings.REPLICA_DATABASE in settings.DATABASES
+
+
+def get_pin_key(user) -> str:
+    return REPLICA_PIN_KEY.format(user_id=user.pk)
+
+
+def pin_to_primary(user):
+    if has_replica() and user.is_authenticated:
+        cache.set(get_pin_key(user), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def can_read_replica(user) -> bool:
+    return has_replica() and (user.is_anonymous
+                              or cache.get(get_pin_key(user)) is None)
+
+
+def is_replica_settled(version: int) -> bool:
+    return (not replica_reads.get() or time_ns() - version
+            > settings.REPLICA_STICKY_SECONDS * 1_000_000_000)
+
+
+@contextmanager
+def primary_reads():
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if replica_reads.get() and has_replica():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= set(settings.DATABASES):
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_reads.set(False)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+        if self.request.method not in SAFE_METHODS:
+            pin_to_primary(self.request.user)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS
+                and can_read_replica(request.user)):
+            replica_reads.set(True)
@@ -0,0 +1,77 @@
+import re
+from functools import reduce
+from operator import add, or_
+from typing import Iterable, Optional
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections, router
+from django.db.models import F, Q, QuerySet, Value
+
+from recipes.models import Recipes
+
+SEARCH_CONFIGS = ('russian', 'english')
+SEARCH_BATCH_SIZE = 1000
+SEARCH_TOKEN = re.compile(r'\w+')
+
+
+def get_vendor(using: Optional[str] = None) -> str:
+    return connections[using or router.db_for_write(Recipes)].vendor
+
+
+def get_search_vector(name='name', text='text') -> SearchVector:
+    return reduce(add, (
+        SearchVector(name, weight='A', config=config)
+        + SearchVector(text, weight='B', config=config)
+        for config in SEARCH_CONFIGS
+    ))
+
+
+def set_search_vector(recipe: Recipes, using: Optional[str] = None):
+    if get_vendor(using) == 'postgresql':
+        recipe.search_vector = get_search_vector(Value(recipe.name),
+                                                 Value(recipe.text))
+
+
+def update_search_index(recipe_ids: Optional[Iterable[int]] = None,
+                        missing_only: bool = False,
+                        using: Optional[str] = None) -> int:
+    using = using or router.db_for_write(Recipes)
+    recipe_ids = None if recipe_ids is None else list(recipe_ids)
+    if recipe_ids == [] or get_vendor(using) != 'postgresql':
+        return 0
+
+    recipes = Recipes.objects.using(using).order_by('pk')
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    if missing_only:
+        recipes = recipes.filter(search_vector__isnull=True)
+
+    updated = last_pk = 0
+    while True:
+        batch = list(recipes.filter(pk__gt=last_pk).values_list(
+            'pk', flat=True)[:SEARCH_BATCH_SIZE])
+        if not batch:
+            return updated
+        updated += Recipes.objects.using(using).filter(
+            pk__in=batch).update(search_vector=get_search_vector())
+        last_pk = batch[-1]
+
+
+def search_recipes(queryset: QuerySet, value: str) -> QuerySet:
+    if get_vendor(queryset.db) == 'postgresql':
+        query = reduce(or_, (
+            SearchQuery(value, config=config, search_type='websearch')
+            for config in SEARCH_CONFIGS
+        ))
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at', '-id')
+
+    tokens = SEARCH_TOKEN.findall(value)
+    if not tokens:
+        return queryset.none()
+    return queryset.filter(*(
+        Q(name__icontains=token) | Q(text__icontains=token)
+        for token in tokens
+    )).annotate(rank=Value(0.0)).order_by('-rank', '-created_at', '-id')
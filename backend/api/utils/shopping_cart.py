@@ -0,0 +1,70 @@
+from functools import lru_cache
+from hashlib import sha256
+from io import BytesIO
+from typing import Tuple
+
+from django.db.models import F, QuerySet, Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+from foodgram.settings import FONT_DIRS
+from recipes.models import IngredientAmount
+
+SHOPPING_LIST_CACHE_SIZE = 128
+
+
+def get_shopping_cart_ingredients(user) -> QuerySet:
+    return IngredientAmount.objects.filter(
+        recipe__shopcart__user_cart=user,
+        recipe__shopcart__is_in_shopping_cart=True
+    ).values(
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit')
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('name', 'measurement_unit')
+
+
+def get_shopping_list_lines(user) -> Tuple[str, ...]:
+    return tuple(
+        f"{ingredient['name']} ({ingredient['measurement_unit']}) - "
+        f"{ingredient['total_amount']}"
+        for ingredient in get_shopping_cart_ingredients(user)
+    )
+
+
+def get_shopping_list_etag(lines: Tuple[str, ...], author: str) -> str:
+    content = sha256(author.encode())
+    for line in lines:
+        content.update(b'\n' + line.encode())
+    return f'"{content.hexdigest()}"'
+
+
+@lru_cache(maxsize=None)
+def get_shopping_list_style() -> ParagraphStyle:
+    pdfmetrics.registerFont(TTFont('DejaVuSerif',
+                                   FONT_DIRS / 'DejaVuSerif.ttf',
+                                   'UTF-8'))
+    russian_style = getSampleStyleSheet()['Normal']
+    russian_style.fontName = 'DejaVuSerif'
+    return russian_style
+
+
+@lru_cache(maxsize=SHOPPING_LIST_CACHE_SIZE)
+def render_shopping_list(lines: Tuple[str, ...], author: str) -> bytes:
+    russian_style = get_shopping_list_style()
+    buffer = BytesIO()
+    ingredients_pdf = SimpleDocTemplate(
+        buffer, pagesize=A4, title='Ingredients', author=author
+    )
+    story = []
+
+    for line in lines:
+        story.append(Paragraph(line, russian_style))
+        story.append(Spacer(1, 10))
+
+    ingredients_pdf.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from copy import copy
+from hashlib import sha256
+from threading import Lock
+from time import monotonic, time_ns
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+from api.utils.metrics import request_metrics
+from users.models import User
+
+TOKEN_CACHE_KEY = 'auth_token:{digest}'
+TOKEN_REVISION_KEY = 'auth_revision:{user_id}'
+
+
+def get_token_cache_key(key: str) -> str:
+    return TOKEN_CACHE_KEY.format(digest=sha256(key.encode()).hexdigest())
+
+
+def get_revision_key(user_id: int) -> str:
+    return TOKEN_REVISION_KEY.format(user_id=user_id)
+
+
+def copy_token(token: Token) -> Token:
+    token = copy(token)
+    token.user = copy(token.user)
+    return token
+
+
+def get_shared_entry(token: Token) -> Tuple[int, bool]:
+    return token.user_id, token.user.is_active
+
+
+class TokenCache:
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, Token, int]]' = (
+            OrderedDict())
+
+    def get_local(self, key: str) -> Optional[Tuple[Token, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set_local(self, key: str, token: Token, revision: int):
+        if settings.TOKEN_AUTH_CACHE_SIZE < 1:
+            return
+        with self._lock:
+            self._entries[key] = (
+                monotonic() + settings.TOKEN_AUTH_CACHE_TIMEOUT, token,
+                revision)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def drop_local(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def get_revision(self, user_id: int) -> int:
+        return cache.get(get_revision_key(user_id), 0)
+
+    def load(self, key: str) -> Optional[Token]:
+        return Token.objects.select_related('user').filter(key=key).first()
+
+    def load_shared(self, key: str, user_id: int,
+                    is_active: bool) -> Optional[Token]:
+        user = (User.objects.filter(pk=user_id).first() if is_active
+                else User(pk=user_id, is_active=False))
+        return Token(key=key, user=user) if user is not None else None
+
+    def get(self, key: str) -> Optional[Token]:
+        entry = self.get_local(key)
+        if entry is not None:
+            token, revision = entry
+            if revision == self.get_revision(token.user_id):
+                request_metrics.count_token_cache('local')
+                return copy_token(token)
+            self.drop_local([key])
+
+        token = None
+        if settings.TOKEN_AUTH_SHARED_CACHE:
+            shared = cache.get(get_token_cache_key(key))
+            if shared is not None:
+                token = self.load_shared(key, *shared)
+        if token is not None:
+            request_metrics.count_token_cache('shared')
+        else:
+            request_metrics.count_token_cache('miss')
+            token = self.load(key)
+            if token is not None and settings.TOKEN_AUTH_SHARED_CACHE:
+                cache.set(get_token_cache_key(key), get_shared_entry(token),
+                          settings.TOKEN_AUTH_SHARED_CACHE_TIMEOUT)
+        if token is not None:
+            self.set_local(key, copy_token(token),
+                           self.get_revision(token.user_id))
+        return token
+
+    def invalidate(self, keys: Iterable[str], user_ids: Iterable[int]):
+        keys = list(keys)
+        self.drop_local(keys)
+        cache.set_many({get_revision_key(user_id): time_ns()
+                        for user_id in user_ids},
+                       settings.TOKEN_AUTH_CACHE_TIMEOUT)
+        if settings.TOKEN_AUTH_SHARED_CACHE and keys:
+            cache.delete_many([get_token_cache_key(key) for key in keys])
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            keys = {key for key, (_, token, _) in self._entries.items()
+                    if token.user_id == user_id}
+        keys.update(Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True))
+        self.invalidate(keys, [user_id])
+
+
+token_cache = TokenCache()
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from math import log2
+from typing import Dict, Optional, Tuple, Type
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from recipes.models import (FavoriteRecipes, Recipes, RecipeTrending,
+                            ShoppingCart)
+
+TRENDING_EPOCH = datetime.fromisoformat('2023-01-01T00:00:00+00:00')
+TRENDING_LAG = timedelta(seconds=30)
+TRENDING_MIN_SCORE = 0.01
+TRENDING_EVENTS: Tuple[Tuple[Type[models.Model], str, str, str, float],
+                       ...] = (
+    (FavoriteRecipes, 'recipe_fav', 'activated_at', 'is_follow_rec', 2.0),
+    (ShoppingCart, 'recipe_cart', 'activated_at', 'is_in_shopping_cart',
+     1.0),
+)
+
+
+def get_half_lives(moment: datetime) -> float:
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 60 * 60
+    return (moment - TRENDING_EPOCH).total_seconds() / half_life
+
+
+def add_log_scores(first: float, second: float) -> float:
+    high, low = max(first, second), min(first, second)
+    return high + log2(1 + 2 ** (low - high))
+
+
+def collect_scores(since: datetime, until: datetime) -> Dict[int, float]:
+    scores: Dict[int, float] = {}
+    for model, recipe_field, time_field, flag_field, weight in TRENDING_EVENTS:
+        events = model.objects.filter(**{
+            f'{time_field}__gt': since,
+            f'{time_field}__lte': until,
+            flag_field: True,
+        }).order_by().values_list(f'{recipe_field}_id', time_field)
+
+        for recipe_id, created_at in events.iterator(chunk_size=5000):
+            score = log2(weight) + get_half_lives(created_at)
+            scores[recipe_id] = (add_log_scores(scores[recipe_id], score)
+                                 if recipe_id in scores else score)
+    return scores
+
+
+@transaction.atomic
+def refresh_trending(now: Optional[datetime] = None,
+                     rebuild: bool = False) -> Dict[str, int]:
+    now = now or timezone.now()
+    until = now - TRENDING_LAG
+    window = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS * 8)
+
+    if rebuild:
+        RecipeTrending.objects.all().delete()
+    since = RecipeTrending.objects.aggregate(
+        since=Max('updated_at'))['since'] or until - window
+    since = max(since, until - window)
+
+    scores = collect_scores(since, until)
+    existing = RecipeTrending.objects.select_for_update().in_bulk(
+        list(scores))
+    recipe_ids = set(Recipes.objects.filter(
+        pk__in=scores.keys() - existing.keys()).values_list('pk', flat=True))
+
+    for recipe_id, trending in existing.items():
+        trending.score = add_log_scores(trending.score, scores[recipe_id])
+        trending.updated_at = until
+    RecipeTrending.objects.bulk_update(existing.values(),
+                                       ['score', 'updated_at'])
+    RecipeTrending.objects.bulk_create([
+        RecipeTrending(recipe_id=recipe_id, score=scores[recipe_id],
+                       updated_at=until)
+        for recipe_id in recipe_ids
+    ])
+
+    pruned, _ = RecipeTrending.objects.filter(
+        score__lt=get_half_lives(now) + log2(TRENDING_MIN_SCORE)
+    ).delete()
+    return {'created': len(recipe_ids), 'updated': len(existing),
+            'pruned': pruned}
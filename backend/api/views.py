@@ -1,49 +1,76 @@
-from collections import defaultdict
 from io import BytesIO
-from typing import Dict
 
-from django.http import FileResponse, JsonResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action
+from djoser.conf import settings as djoser_settings
+from djoser.utils import logout_user
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 
 from api.permissions import (IsAuthor, IsAuthorOrSafeMethodOrAdmin,
                              IsYourShopCart)
-from api.serializers import (IngredientsSerializer, RecipeFavoriteSerializer,
-                             RecipeGetSerializer, RecipePostSerializer,
-                             TagsSerializer, UserFavouriteSerializer,
-                             UserPasswordSerializer, UserSerializer)
+from api.serializers import (BulkIdsSerializer, IngredientsSerializer,
+                             RecipeFavoriteSerializer, RecipeGetSerializer,
+                             RecipePostSerializer, TagsSerializer,
+                             UserFavouriteSerializer, UserPasswordSerializer,
+                             UserSerializer)
+from api.utils.bulk import BULK_ADDED, BULK_REMOVED, bulk_toggle
+from api.utils.catalog import CatalogCacheMixin
+from api.utils.counters import set_toggle
+from api.utils.feed import (follow_authors, get_feed_queryset,
+                            unfollow_authors)
 from api.utils.custom_filter import (CustomFilterIsFavoritedIsShoppingCart,
-                                     CustomRecipesPagination)
-from foodgram.settings import FONT_DIRS
+                                     CustomRecipesPagination, FeedPagination,
+                                     UsersPagination)
+from api.utils.ingredient_search import ingredient_search_index
+from api.utils.metrics import (PROMETHEUS_CONTENT_TYPE, SerializerTimingMixin,
+                               request_metrics)
+from api.utils.recipe_values import (get_recipe_rows, serialize_recipe_rows,
+                                     serialize_recipes)
+from api.utils.recipes_cache import (get_recipes_list_cache_key,
+                                     get_recipes_list_version,
+                                     is_recipes_list_cacheable,
+                                     overlay_user_flags, strip_user_flags)
+from api.utils.replica import ReplicaReadMixin, is_replica_settled
+from api.utils.shopping_cart import (get_shopping_list_etag,
+                                     get_shopping_list_lines,
+                                     render_shopping_list)
 from recipes.models import (FavoriteRecipes, Ingredients, Recipes,
                             ShoppingCart, Tags)
 from users.models import User, UsersFollowing
 
 
-class UsersViewset(mixins.CreateModelMixin,
+class UsersViewset(ReplicaReadMixin, SerializerTimingMixin,
+                   mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
                    mixins.ListModelMixin,
                    viewsets.GenericViewSet):
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UsersPagination
     http_method_names = ['get', 'post', 'delete']
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve', 'get_me'):
+            return User.objects.with_subscribed(self.request.user)
+        return super().get_queryset()
+
     @action(detail=False, methods=['get'], url_path='me',
             permission_classes=[IsAuthenticatedOrReadOnly])
     def get_me(self, request):
-        return Response(self.get_serializer(request.user).data,
+        user = get_object_or_404(self.get_queryset(), pk=request.user.pk)
+        return Response(self.get_serializer(user).data,
                         status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], url_path='set_password',
@@ -58,25 +85,62 @@ class UsersViewset(mixins.CreateModelMixin,
         user = request.user
         new_password = serializer.validated_data['new_password']
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=['password'])
+        if djoser_settings.LOGOUT_ON_PASSWORD_CHANGE:
+            logout_user(request)
         return Response(False)
 
+    def get_subscriptions_queryset(self, request):
+        recipes = Recipes.objects.all()
+        recipes_limit = request.query_params.get('recipes_limit', '')
+
+        if recipes_limit.isdigit() and int(recipes_limit) > 0:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipes.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:int(recipes_limit)]
+            ))
+
+        return User.objects.with_subscribed(request.user).prefetch_related(
+            Prefetch('recipes', queryset=recipes))
+
     @action(detail=False, methods=['get', ], url_path='subscriptions',
             permission_classes=[IsAuthenticated])
     def subscribtions(self, request):
 
-        queryset = [follow.following for follow in
-                    UsersFollowing.objects.filter(follower=request.user,
-                                                  is_follow=True)]
+        queryset = self.get_subscriptions_queryset(request).filter(
+            following__follower=request.user, following__is_follow=True
+        ).order_by('-following__created_at')
         paginator = LimitOffsetPagination()
 
         serializer = UserFavouriteSerializer(
-            paginator.paginate_queryset(queryset, request),
+            paginator.paginate_queryset(queryset, request, view=self),
             many=True,
-            context=request.user
+            context={'request': request}
         )
         return paginator.get_paginated_response(serializer.data)
 
+    @action(detail=False, methods=['post', 'delete', ],
+            url_path='bulk_subscribe', permission_classes=[IsAuthenticated])
+    def bulk_subscribe(self, request):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        allowed = {user_id: user_id != request.user.id for user_id
+                   in User.objects.filter(id__in=ids).values_list(
+                       'id', flat=True)}
+        add = request.method == 'POST'
+        results = bulk_toggle(UsersFollowing, 'follower', 'following',
+                              'is_follow', request.user, ids, allowed, add)
+
+        changed = [result['id'] for result in results
+                   if result['status'] in (BULK_ADDED, BULK_REMOVED)]
+        if changed:
+            sync_feed = follow_authors if add else unfollow_authors
+            sync_feed(request.user, changed)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post', 'delete', ], url_path='subscribe',
             permission_classes=[IsAuthenticated])
     def subscribe(self, request, pk=None):
@@ -85,29 +149,31 @@ class UsersViewset(mixins.CreateModelMixin,
 
         if request.method == 'POST':
             if not request.user == user_to_follow:
-                user_follow, created = UsersFollowing.objects.get_or_create(
-                    follower=request.user, following=user_to_follow)
-                serializer = UserFavouriteSerializer(request.user,
-                                                     context=user_to_follow)
-
-                user_follow.is_follow = True
-                user_follow.save()
+                if set_toggle(UsersFollowing, True, follower=request.user,
+                              following=user_to_follow):
+                    follow_authors(request.user, [user_to_follow.pk])
+                serializer = UserFavouriteSerializer(
+                    self.get_subscriptions_queryset(request).get(
+                        pk=user_to_follow.pk),
+                    context={'request': request}
+                )
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
             return Response({'detail': 'You cant subscribe to yourself'},
                             status=status.HTTP_400_BAD_REQUEST)
 
         else:
-            user_following = get_object_or_404(
+            get_object_or_404(
                 UsersFollowing, follower=request.user, following=user_to_follow
             )
-
-            user_following.is_follow = False
-            user_following.save()
+            if set_toggle(UsersFollowing, False, follower=request.user,
+                          following=user_to_follow):
+                unfollow_authors(request.user, [user_to_follow.pk])
             return Response(False)
 
 
-class RecipsViewset(viewsets.ModelViewSet):
+class RecipsViewset(ReplicaReadMixin, SerializerTimingMixin,
+                    viewsets.ModelViewSet):
 
     queryset = Recipes.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly,
@@ -117,6 +183,44 @@ class RecipsViewset(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = CustomFilterIsFavoritedIsShoppingCart
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.with_related().with_user_flags(
+                self.request.user)
+        return queryset
+
+    def list_rows(self, queryset):
+        page = self.paginate_queryset(get_recipe_rows(queryset))
+        return self.get_paginated_response(
+            serialize_recipe_rows(page, self.request))
+
+    def list(self, request, *args, **kwargs):
+        if not is_recipes_list_cacheable(request):
+            return self.list_rows(self.filter_queryset(self.get_queryset()))
+
+        cache_key = get_recipes_list_cache_key(request)
+        data = cache.get(cache_key)
+        if data is None:
+            response = self.list_rows(
+                self.filter_queryset(self.get_queryset()))
+            if is_replica_settled(get_recipes_list_version()):
+                cache.set(cache_key, strip_user_flags(response.data),
+                          settings.RECIPES_LIST_CACHE_TIMEOUT)
+            return response
+        return Response(overlay_user_flags(data, request.user))
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            recipes = serialize_recipes(queryset.filter(pk=kwargs['pk']),
+                                        request)
+        except (TypeError, ValueError):
+            recipes = []
+        if not recipes:
+            raise Http404
+        return Response(recipes[0])
+
     def render_to_response(self, context, **response_kwargs):
         return JsonResponse(list(
             self.get_queryset().values_list('code', flat=True)
@@ -136,74 +240,96 @@ class RecipsViewset(viewsets.ModelViewSet):
         if request.method == 'POST':
 
             if not request.user == recipe.author:
-                recipese_fav, created = FavoriteRecipes.objects.get_or_create(
-                    user_fav=request.user, recipe_fav=recipe)
+                set_toggle(FavoriteRecipes, True, user_fav=request.user,
+                           recipe_fav=recipe)
                 serializer = RecipeFavoriteSerializer(recipe)
-
-                recipese_fav.is_follow_rec = True
-                recipese_fav.save()
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
             return Response({'detail': 'You cant favourite your own recipes!'},
                             status=status.HTTP_400_BAD_REQUEST)
 
         else:
-            user_fav_rec = get_object_or_404(FavoriteRecipes,
-                                             user_fav=request.user,
-                                             recipe_fav=recipe)
-
-            user_fav_rec.is_follow_rec = False
-            user_fav_rec.save()
+            get_object_or_404(FavoriteRecipes, user_fav=request.user,
+                              recipe_fav=recipe)
+            set_toggle(FavoriteRecipes, False, user_fav=request.user,
+                       recipe_fav=recipe)
             return Response(False)
 
+    def bulk_toggle_recipes(self, request, model, user_field, target_field,
+                            flag_field, own_allowed):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        allowed = {recipe_id: own_allowed or author_id != request.user.id
+                   for recipe_id, author_id
+                   in Recipes.objects.filter(id__in=ids).values_list(
+                       'id', 'author_id')}
+        return Response({'results': bulk_toggle(
+            model, user_field, target_field, flag_field,
+            request.user, ids, allowed, add=request.method == 'POST'
+        )}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post', 'delete', ],
+            url_path='bulk_favorite', permission_classes=[IsAuthenticated])
+    def bulk_favorite(self, request):
+        return self.bulk_toggle_recipes(request, FavoriteRecipes, 'user_fav',
+                                        'recipe_fav', 'is_follow_rec',
+                                        own_allowed=False)
+
+    @action(detail=False, methods=['post', 'delete', ],
+            url_path='bulk_shopping_cart',
+            permission_classes=[IsAuthenticated])
+    def bulk_shopping_cart(self, request):
+        return self.bulk_toggle_recipes(request, ShoppingCart, 'user_cart',
+                                        'recipe_cart', 'is_in_shopping_cart',
+                                        own_allowed=True)
+
+    @action(detail=False, methods=['get', ], url_path='feed',
+            permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        queryset = get_feed_queryset(request.user, self.get_queryset())
+        paginator = FeedPagination()
+        if queryset.model is Recipes:
+            page = paginator.paginate_queryset(get_recipe_rows(queryset),
+                                               request, view=self)
+        else:
+            paginator.cursor_ordering = ('-created_at', '-recipe_id')
+            entries = paginator.paginate_queryset(queryset, request,
+                                                  view=self)
+            recipes = {row['id']: row for row in get_recipe_rows(
+                self.get_queryset().filter(
+                    pk__in=[entry.recipe_id for entry in entries]))}
+            page = [recipes[entry.recipe_id] for entry in entries
+                    if entry.recipe_id in recipes]
+
+        return paginator.get_paginated_response(
+            serialize_recipe_rows(page, request))
+
+    @action(detail=False, methods=['get', ], url_path='trending',
+            permission_classes=[IsAuthenticatedOrReadOnly])
+    def trending(self, request):
+        return self.list_rows(self.filter_queryset(self.get_queryset().filter(
+            trending__isnull=False
+        ).order_by('-trending__score', '-id')))
+
     @action(detail=False, methods=['get', ],
             url_path='download_shopping_cart',
             permission_classes=[IsAuthenticated, IsYourShopCart])
     def download_shopping_cart(self, request):
 
-        formated_ingredients: Dict[str, int] = defaultdict(int)
-        ingredients_amount_tuple = [
-            (shopcart.recipe_cart.ingredients.all(),
-             shopcart.recipe_cart.ingredientamount.all())
-            for shopcart in ShoppingCart.objects.filter(
-                user_cart=request.user, is_in_shopping_cart=True
-            )
-        ]
-
-        for (ingredients, ingredients_amount) in ingredients_amount_tuple:
-            for ingredient, ingredient_amount in zip(ingredients,
-                                                     ingredients_amount):
-                ingredient_str = (f'{ingredient.name} '
-                                  f'({ingredient.measurement_unit}) -')
-                formated_ingredients[
-                    ingredient_str] += ingredient_amount.amount
-
-        styles = getSampleStyleSheet()
-        russian_style, styles['Normal'
-                              ].fontName = styles['Normal'], 'DejaVuSerif'
-
-        pdfmetrics.registerFont(TTFont('DejaVuSerif',
-                                       FONT_DIRS / 'DejaVuSerif.ttf',
-                                       'UTF-8'))
-
-        buffer = BytesIO()
-        ingredients_pdf = SimpleDocTemplate(
-            buffer, pagesize=A4, title='Ingredients',
-            author=request.user.username
-        )
-        story = []
+        lines = get_shopping_list_lines(request.user)
+        etag = get_shopping_list_etag(lines, request.user.username)
 
-        for ingredient, ingredients_amount in formated_ingredients.items():
-            story.append(
-                Paragraph(f"{ingredient} {ingredients_amount}", russian_style)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = FileResponse(
+                BytesIO(render_shopping_list(lines, request.user.username)),
+                as_attachment=True, filename="ingredients_list.pdf"
             )
-            story.append(Spacer(1, 10))
-
-        ingredients_pdf.build(story)
-        buffer.seek(0)
-
-        return FileResponse(buffer, as_attachment=True,
-                            filename="ingredients_list.pdf")
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     @action(detail=True, methods=['post', 'delete', ],
             url_path='shopping_cart',
@@ -213,32 +339,47 @@ class RecipsViewset(viewsets.ModelViewSet):
         recipe = get_object_or_404(Recipes, id=pk)
 
         if request.method == 'POST':
-            shopcart, created = ShoppingCart.objects.get_or_create(
-                user_cart=request.user, recipe_cart=recipe)
-            serializer = RecipeFavoriteSerializer(shopcart.recipe_cart)
-
-            shopcart.is_in_shopping_cart = True
-            shopcart.save()
+            set_toggle(ShoppingCart, True, user_cart=request.user,
+                       recipe_cart=recipe)
+            serializer = RecipeFavoriteSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         else:
-            user_fav_rec = get_object_or_404(ShoppingCart,
-                                             user_cart=request.user,
-                                             recipe_cart=recipe)
-            user_fav_rec.is_in_shopping_cart = False
-            user_fav_rec.save()
+            get_object_or_404(ShoppingCart, user_cart=request.user,
+                              recipe_cart=recipe)
+            set_toggle(ShoppingCart, False, user_cart=request.user,
+                       recipe_cart=recipe)
             return Response(False)
 
 
-class TagsViewset(viewsets.ReadOnlyModelViewSet):
+class TagsViewset(ReplicaReadMixin, SerializerTimingMixin, CatalogCacheMixin,
+                  viewsets.ReadOnlyModelViewSet):
     queryset = Tags.objects.all()
     serializer_class = TagsSerializer
     pagination_class = None
 
 
-class IngredientsViewset(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewset(ReplicaReadMixin, SerializerTimingMixin,
+                         CatalogCacheMixin,
+                         viewsets.ReadOnlyModelViewSet):
     queryset = Ingredients.objects.all()
     serializer_class = IngredientsSerializer
     pagination_class = None
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name']
+
+    def list(self, request, *args, **kwargs):
+        name = (request.query_params.get('name')
+                or request.query_params.get('search'))
+        if not name:
+            return super().list(request, *args, **kwargs)
+
+        limit = request.query_params.get('limit', '')
+        return Response(ingredient_search_index.search(
+            name, int(limit) if limit.isdigit() else None
+        ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    return HttpResponse(request_metrics.expose(),
+                        content_type=PROMETHEUS_CONTENT_TYPE)
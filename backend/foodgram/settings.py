@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,16 +63,52 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB', 'just_DB'),
-        'USER': os.getenv('POSTGRES_USER', 'just_user'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', 5432),
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql')
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'just_DB'),
+            'USER': os.getenv('POSTGRES_USER', 'just_user'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', 5432),
+        }
+    }
+REPLICA_DATABASE = 'replica'
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_ENGINE != 'sqlite3':
+        DATABASES[REPLICA_DATABASE].update(
+            HOST=os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+            PORT=os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        )
+DATABASE_ROUTERS = ['api.utils.replica.ReplicaRouter']
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'foodgram',
+        }
     }
-}
 AUTH_USER_MODEL = 'users.User'
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -94,7 +131,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS':
     ['django_filters.rest_framework.DjangoFilterBackend'],
@@ -103,6 +140,27 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60 * 60))
+RECIPES_LIST_CACHE_TIMEOUT = int(
+    os.getenv('RECIPES_LIST_CACHE_TIMEOUT', 5 * 60))
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 84))
+TRENDING_REFRESH_INTERVAL = int(os.getenv('TRENDING_REFRESH_INTERVAL', 5 * 60))
+FEED_MAX_FOLLOWING = int(os.getenv('FEED_MAX_FOLLOWING', 500))
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 500))
+FEED_FANOUT_WORKERS = int(os.getenv('FEED_FANOUT_WORKERS', 2))
+REQUEST_METRICS_ENABLED = os.getenv(
+    'REQUEST_METRICS_ENABLED', 'False').lower() in ('true', '1')
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', 'False').lower() in ('true', '1')
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+TOKEN_AUTH_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT', 30))
+TOKEN_AUTH_SHARED_CACHE = os.getenv(
+    'TOKEN_AUTH_SHARED_CACHE', 'False').lower() in ('true', '1')
+TOKEN_AUTH_SHARED_CACHE_TIMEOUT = int(
+    os.getenv('TOKEN_AUTH_SHARED_CACHE_TIMEOUT', 5 * 60))
+
 DJOSER = {
     'LOGOUT_ON_PASSWORD_CHANGE': True,
 }
@@ -0,0 +1,8 @@
+import os
+
+bind = '0.0.0.0:8000'
+wsgi_app = 'foodgram.wsgi:application'
+
+if os.getenv('SERVER_PROFILE', 'wsgi') == 'asgi':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
@@ -0,0 +1,75 @@
+import json
+from time import sleep
+from typing import Dict, Type
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+
+from recipes.models import FavoriteRecipes, ShoppingCart
+from users.models import UsersFollowing
+
+TOGGLE_FIELDS: Dict[Type[models.Model], str] = {
+    FavoriteRecipes: 'is_follow_rec',
+    ShoppingCart: 'is_in_shopping_cart',
+    UsersFollowing: 'is_follow',
+}
+
+
+class Command(BaseCommand):
+    help = 'delete or archive inactive favorite, cart and follow rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='seconds to sleep between batches')
+        parser.add_argument('--archive', type=str, default=None,
+                            help='append deleted rows to this JSONL file')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='run VACUUM ANALYZE afterwards (PostgreSQL)')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def compact(self, model: Type[models.Model], field: str,
+                options, archive) -> int:
+        inactive = model.objects.filter(**{field: False}).order_by('pk')
+        if options['dry_run']:
+            return inactive.count()
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                batch = inactive.select_for_update(skip_locked=True)
+                rows = list(batch.values()[:options['batch_size']])
+                if not rows:
+                    break
+                if archive is not None:
+                    for row in rows:
+                        archive.write(json.dumps(
+                            {'model': model._meta.label, 'fields': row},
+                            cls=DjangoJSONEncoder, ensure_ascii=False
+                        ) + '\n')
+                count, _ = inactive.filter(
+                    pk__in=[row['id'] for row in rows]).delete()
+                deleted += count
+            sleep(options['pause'])
+        return deleted
+
+    def handle(self, *args, **options):
+
+        archive = (open(options['archive'], 'a', encoding='utf-8')
+                   if options['archive'] else None)
+        try:
+            for model, field in TOGGLE_FIELDS.items():
+                deleted = self.compact(model, field, options, archive)
+
+                if options['vacuum'] and connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'VACUUM ANALYZE {model._meta.db_table}')
+
+                action = 'к удалению' if options['dry_run'] else 'удалено'
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model._meta.db_table}: {action} {deleted}'))
+        finally:
+            if archive is not None:
+                archive.close()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.feed import run_fan_out
+from recipes.models import FeedFanOut
+
+
+class Command(BaseCommand):
+    help = 'deliver recipes whose feed fan-out has not finished'
+
+    def handle(self, *args, **options):
+
+        delivered = failed = 0
+        for recipe_id in list(FeedFanOut.objects.values_list(
+                'recipe_id', flat=True)):
+            if run_fan_out(recipe_id):
+                delivered += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов разослано в ленты: {delivered}, с ошибкой: {failed}'))
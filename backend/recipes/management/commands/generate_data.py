@@ -0,0 +1,165 @@
+import random
+from itertools import islice
+from typing import Iterable, Iterator, List, Type
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from api.utils.catalog import bump_catalog_version
+from recipes.models import (FavoriteRecipes, IngredientAmount, Ingredients,
+                            Recipes, ShoppingCart, Tags)
+from users.models import User, UsersFollowing
+
+GENERATED_PASSWORD = 'foodgram-benchmark'
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'generate a synthetic dataset of users, recipes and relations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes-per-user', type=float, default=5,
+                            help='mean of the skewed recipes distribution')
+        parser.add_argument('--max-recipes-per-user', type=int, default=500)
+        parser.add_argument('--ingredients-per-recipe', type=int, nargs=2,
+                            default=(3, 15), metavar=('MIN', 'MAX'))
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--inactive-share', type=float, default=0.1,
+                            help='share of toggles created switched off')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default='bench')
+
+    def bulk_create(self, model: Type[models.Model], objects: Iterable,
+                    batch_size: int) -> int:
+        created = 0
+        for batch in batched(objects, batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+        return created
+
+    def skewed_count(self, mean: float, maximum: int) -> int:
+        if mean <= 0:
+            return 0
+        alpha = 1.5
+        scale = mean * (alpha - 1) / alpha
+        return min(int(random.paretovariate(alpha) * scale), maximum)
+
+    def create_users(self, options) -> List[int]:
+        prefix = options['prefix']
+        password = make_password(GENERATED_PASSWORD)
+        start = User.objects.filter(
+            username__startswith=f'{prefix}_').count()
+        users = (
+            User(username=f'{prefix}_{number}',
+                 email=f'{prefix}_{number}@foodgram.bench',
+                 first_name=f'Имя {number}', last_name=f'Фамилия {number}',
+                 password=password)
+            for number in range(start, start + options['users'])
+        )
+        self.bulk_create(User, users, options['batch_size'])
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).order_by('-pk').values_list('pk', flat=True)[:options['users']])
+
+    def create_recipes(self, user_ids: List[int], options) -> List[int]:
+        counts = {user_id: self.skewed_count(
+            options['recipes_per_user'], options['max_recipes_per_user'])
+            for user_id in user_ids}
+        recipes = (
+            Recipes(author_id=user_id, name=f'Рецепт {user_id}-{number}',
+                    text='Сгенерированный рецепт', image='',
+                    cooking_time=random.randint(1, 240))
+            for user_id, count in counts.items()
+            for number in range(count)
+        )
+        self.bulk_create(Recipes, recipes, options['batch_size'])
+        return list(Recipes.objects.filter(
+            author_id__in=user_ids).values_list('pk', flat=True))
+
+    def create_recipe_relations(self, recipe_ids: List[int], options):
+        ingredient_ids = list(Ingredients.objects.values_list('pk',
+                                                              flat=True))
+        tag_ids = list(Tags.objects.values_list('pk', flat=True))
+        minimum, maximum = options['ingredients_per_recipe']
+
+        self.bulk_create(IngredientAmount, (
+            IngredientAmount(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                             amount=random.randint(1, 500))
+            for recipe_id in recipe_ids
+            for ingredient_id in random.sample(
+                ingredient_ids,
+                min(random.randint(minimum, maximum), len(ingredient_ids)))
+        ), options['batch_size'])
+
+        self.bulk_create(Recipes.tags.through, (
+            Recipes.tags.through(recipes_id=recipe_id, tags_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in random.sample(tag_ids,
+                                        random.randint(1, len(tag_ids)))
+        ), options['batch_size'])
+
+    def create_toggles(self, user_ids: List[int], options):
+        recipes = list(Recipes.objects.filter(
+            author_id__in=user_ids).values_list('pk', 'author_id'))
+        authors = [author_id for _, author_id in recipes]
+        active = 1 - options['inactive_share']
+
+        def pick(population, count):
+            return set(random.choices(population, k=count)) if count else ()
+
+        self.bulk_create(FavoriteRecipes, (
+            FavoriteRecipes(user_fav_id=user_id, recipe_fav_id=recipe_id,
+                            is_follow_rec=random.random() < active)
+            for user_id in user_ids
+            for recipe_id, author_id in pick(recipes,
+                                             options['favorites_per_user'])
+            if author_id != user_id and recipe_id != user_id
+        ), options['batch_size'])
+
+        self.bulk_create(ShoppingCart, (
+            ShoppingCart(user_cart_id=user_id, recipe_cart_id=recipe_id,
+                         is_in_shopping_cart=random.random() < active)
+            for user_id in user_ids
+            for recipe_id, _ in pick(recipes, options['cart_per_user'])
+        ), options['batch_size'])
+
+        self.bulk_create(UsersFollowing, (
+            UsersFollowing(follower_id=user_id, following_id=author_id,
+                           is_follow=random.random() < active)
+            for user_id in user_ids
+            for author_id in pick(authors, options['follows_per_user'])
+            if author_id != user_id
+        ), options['batch_size'])
+
+    def handle(self, *args, **options):
+
+        random.seed(options['seed'])
+        if not Ingredients.objects.exists() or not Tags.objects.exists():
+            call_command('load_data', stdout=self.stdout)
+
+        user_ids = self.create_users(options)
+        recipe_ids = self.create_recipes(user_ids, options)
+        self.create_recipe_relations(recipe_ids, options)
+        self.create_toggles(user_ids, options)
+        call_command('reconcile_counters', stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+        call_command('update_search_index', stdout=self.stdout)
+        bump_catalog_version(Recipes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Сгенерировано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}. '
+            f'Пароль пользователей: {GENERATED_PASSWORD}'
+        ))
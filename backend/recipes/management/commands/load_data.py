@@ -1,40 +1,251 @@
-from csv import DictReader
-from typing import Dict, List, Type
+import csv
+import json
+from io import StringIO
+from functools import reduce
+from itertools import islice
+from operator import or_
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple, Type
 
-from django.core.management.base import BaseCommand
-from django.db import models
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Q
 
+from api.utils.catalog import bump_catalog_version
 from foodgram.settings import DATA_DIR
 from recipes.models import MODELS_FIELDS, Ingredients, Tags
 
-MODELS_CSV: Dict[Type[models.Model], str] = {Ingredients: 'ingredients.csv',
-                                             Tags: 'tags.csv'}
+MODELS_DATA: Dict[Type[models.Model], str] = {
+    Ingredients: 'ingredients.json',
+    Tags: 'tags.csv',
+}
+JSON_BLOCK_SIZE = 64 * 1024
+
+
+def get_unique_keys(model: Type[models.Model]) -> List[Tuple[str, ...]]:
+    return [(field.name, ) for field in model._meta.fields
+            if field.unique and not field.primary_key] + [
+        tuple(constraint.fields) for constraint in model._meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+    ]
+
+
+def get_key_values(values, key: Tuple[str, ...]) -> Tuple:
+    if isinstance(values, dict):
+        return key, tuple(values[field] for field in key)
+    return key, tuple(getattr(values, field) for field in key)
+
+
+def iter_csv_records(data, fields: List[str]) -> Iterator[Dict]:
+    yield from csv.DictReader(data, fieldnames=fields)
+
+
+def iter_json_records(data, fields: List[str]) -> Iterator[Dict]:
+    decoder = json.JSONDecoder()
+    buffer = ''
+
+    for block in iter(lambda: data.read(JSON_BLOCK_SIZE), ''):
+        buffer += block
+        while True:
+            buffer = buffer.lstrip().lstrip('[,').lstrip()
+            if not buffer or buffer[0] == ']':
+                break
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break
+            yield record
+            buffer = buffer[end:]
+
+    if buffer.strip().strip(']').strip():
+        raise CommandError('Некорректный JSON в конце файла')
+
+
+RECORD_READERS = {'.csv': iter_csv_records,
+                  '.json': iter_json_records,
+                  '.jsonl': iter_json_records}
 
 
 class Command(BaseCommand):
     help = 'populate database with instance of Ingredient model'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=[
+            model._meta.model_name for model in MODELS_DATA])
+        parser.add_argument('--file', type=Path, default=None,
+                            help='CSV, JSON or JSON Lines file to load')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--copy', action='store_true',
+                            help='use COPY on PostgreSQL')
+
     def get_model_fields(self, model: Type[models.Model]) -> List[str]:
         return [field.name for field in model._meta.get_fields()
                 if field.name in MODELS_FIELDS]
 
-    def handle(self, *args, **options):
+    def clean_records(self, records: Iterable[Dict], fields: List[str],
+                      unique_keys: List[Tuple[str, ...]]
+                      ) -> Tuple[List[Dict], int]:
+        cleaned, seen, skipped = [], set(), 0
+        for record in records:
+            values = {field: str(record.get(field) or '').strip()
+                      for field in fields}
+            keys = {get_key_values(values, key) for key in unique_keys}
+            if not all(values[field] for key in unique_keys
+                       for field in key) or keys & seen:
+                skipped += 1
+                continue
+            seen.update(keys)
+            cleaned.append(values)
+        return cleaned, skipped
+
+    def get_existing(self, model: Type[models.Model],
+                     unique_keys: List[Tuple[str, ...]],
+                     records: List[Dict]) -> Dict[Tuple, models.Model]:
+        existing = {}
+        for instance in model.objects.filter(reduce(or_, (
+            Q(**{f'{key[0]}__in': {values[key[0]] for values in records}})
+            for key in unique_keys
+        ))):
+            for key in unique_keys:
+                existing[get_key_values(instance, key)] = instance
+        return existing
+
+    def upsert_chunk(self, model: Type[models.Model], fields: List[str],
+                     unique_keys: List[Tuple[str, ...]],
+                     records: List[Dict]) -> Tuple[int, int, int]:
+        existing = self.get_existing(model, unique_keys, records)
+        to_create, to_update = [], []
+
+        for values in records:
+            matches = {instance.pk: instance for instance in (
+                existing.get(get_key_values(values, key))
+                for key in unique_keys) if instance is not None}
+            if not matches:
+                to_create.append(values)
+                continue
+            if len(matches) > 1:
+                continue
+            instance, = matches.values()
+            if any(getattr(instance, field) != values[field]
+                   for field in fields):
+                for field in fields:
+                    setattr(instance, field, values[field])
+                to_update.append(instance)
+
+        updated = (model.objects.bulk_update(to_update, fields)
+                   if to_update else 0)
+        model.objects.bulk_create([model(**values) for values in to_create],
+                                  ignore_conflicts=True)
+        created = self.get_existing(model, unique_keys[:1], to_create)
+        inserted = sum(get_key_values(values, unique_keys[0]) in created
+                       for values in to_create)
+        return inserted, updated, len(records) - inserted - updated
 
-        for model_clas, file_data in MODELS_CSV.items():
+    def copy_chunk(self, model: Type[models.Model], fields: List[str],
+                   unique_keys: List[Tuple[str, ...]],
+                   records: List[Dict]) -> Tuple[int, int, int]:
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        pk = quote(model._meta.pk.column)
+        columns = {field: quote(model._meta.get_field(field).column)
+                   for field in fields}
+        names = ', '.join(columns.values())
+        match = ' OR '.join(
+            '(' + ' AND '.join(f'{table}.{columns[field]} = '
+                               f'chunk.{columns[field]}' for field in key)
+            + ')' for key in unique_keys
+        )
 
-            fields_model = self.get_model_fields(model_clas)
-            data_to_create: List[models.Model] = []
+        buffer = StringIO()
+        csv.writer(buffer).writerows(
+            [values[field] for field in fields] for values in records)
+        buffer.seek(0)
 
-            with open(
-                f'{DATA_DIR}/{str(model_clas._meta.model_name)}/{file_data}',
-                 'r', encoding='utf-8') as data:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE load_data_chunk ('
+                + ', '.join(f'{column} text' for column in columns.values())
+                + ', matches integer, target_id bigint)'
+            )
+            cursor.copy_expert(
+                f'COPY load_data_chunk ({names}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                'UPDATE load_data_chunk AS chunk SET '
+                f'matches = (SELECT count(*) FROM {table} WHERE {match}), '
+                f'target_id = (SELECT max({pk}) FROM {table} WHERE {match})'
+            )
+            cursor.execute(
+                f'UPDATE {table} SET '
+                + ', '.join(f'{column} = chunk.{column}'
+                            for column in columns.values())
+                + f' FROM load_data_chunk AS chunk WHERE chunk.matches = 1 '
+                f'AND {table}.{pk} = chunk.target_id AND ('
+                + ', '.join(f'{table}.{column}'
+                            for column in columns.values())
+                + ') IS DISTINCT FROM ('
+                + ', '.join(f'chunk.{column}' for column in columns.values())
+                + ')'
+            )
+            updated = cursor.rowcount
+            cursor.execute(
+                f'INSERT INTO {table} ({names}) SELECT {names} '
+                'FROM load_data_chunk WHERE matches = 0 '
+                'ON CONFLICT DO NOTHING'
+            )
+            inserted = cursor.rowcount
+            cursor.execute('DROP TABLE load_data_chunk')
 
-                reader = DictReader(data, fieldnames=fields_model)
+        return inserted, updated, len(records) - inserted - updated
 
-                for record in reader:
-                    data_to_create.append(model_clas(**record))
+    def load(self, model: Type[models.Model], path: Path, options):
+        reader = RECORD_READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('COPY доступен только для PostgreSQL')
+
+        fields = self.get_model_fields(model)
+        unique_keys = get_unique_keys(model)
+        load_chunk = self.copy_chunk if options['copy'] else self.upsert_chunk
+        total = inserted = updated = skipped = 0
+        start = perf_counter()
+
+        with open(path, 'r', encoding='utf-8') as data:
+            records = reader(data, fields)
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                cleaned, invalid = self.clean_records(chunk, fields,
+                                                      unique_keys)
+                with transaction.atomic():
+                    counts = load_chunk(model, fields, unique_keys, cleaned)
+                total += len(chunk)
+                inserted += counts[0]
+                updated += counts[1]
+                skipped += counts[2] + invalid
+
+        bump_catalog_version(model)
+        elapsed = perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные {model._meta.model_name} загружены! '
+            f'Строк: {total}, добавлено: {inserted}, обновлено: {updated}, '
+            f'пропущено: {skipped}, {total / max(elapsed, 1e-9):.0f} строк/с'
+        ))
+
+    def handle(self, *args, **options):
+        if options['file'] and not options['model']:
+            raise CommandError('Для --file нужно указать --model')
 
-                model_clas.objects.bulk_create(data_to_create)
+        for model_clas, file_data in MODELS_DATA.items():
+            if options['model'] not in (None, model_clas._meta.model_name):
+                continue
 
-            self.stdout.write(self.style.SUCCESS(
-                f'Данные {model_clas._meta.model_name} загружены!'))
+            path = Path(
+                options['file']
+                or f'{DATA_DIR}/{str(model_clas._meta.model_name)}/{file_data}'
+            )
+            self.load(model_clas, path, options)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.feed import rebuild_feed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'rebuild followed-authors timelines from subscriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            default=None, help='only rebuild these user ids')
+
+    def handle(self, *args, **options):
+
+        users = User.objects.filter(
+            follower__is_follow=True).distinct().order_by('pk')
+        if options['user']:
+            users = User.objects.filter(pk__in=options['user'])
+
+        rebuilt = 0
+        for user in users.iterator():
+            rebuild_feed(user)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Лент подписок перестроено: {rebuilt}'))
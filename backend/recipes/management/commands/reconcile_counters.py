@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.counters import COUNTERS, Counter, get_actual_count
+
+
+class Command(BaseCommand):
+    help = 'repair drift of denormalized recipe and user counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def reconcile(self, counter: Counter, options) -> int:
+        objects = counter.model.objects.order_by('pk')
+        fixed = last_pk = 0
+
+        while True:
+            batch = list(objects.filter(pk__gt=last_pk).annotate(
+                actual=get_actual_count(counter)
+            ).values_list('pk', counter.field, 'actual')[
+                :options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            drifted = [pk for pk, current, actual in batch
+                       if current != actual]
+            if drifted and not options['dry_run']:
+                objects.filter(pk__in=drifted).update(
+                    **{counter.field: get_actual_count(counter)})
+            fixed += len(drifted)
+        return fixed
+
+    def handle(self, *args, **options):
+
+        for counter in COUNTERS:
+            fixed = self.reconcile(counter, options)
+            action = 'расходится' if options['dry_run'] else 'исправлено'
+            self.stdout.write(self.style.SUCCESS(
+                f'{counter.model._meta.model_name}.{counter.field}: '
+                f'{action} {fixed}'
+            ))
@@ -0,0 +1,31 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'add new favorites and cart entries to the trending scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='recompute scores from scratch')
+        parser.add_argument('--loop', action='store_true',
+                            help='keep refreshing every '
+                                 'TRENDING_REFRESH_INTERVAL seconds')
+
+    def handle(self, *args, **options):
+
+        rebuild = options['rebuild']
+        while True:
+            stats = refresh_trending(rebuild=rebuild)
+            self.stdout.write(self.style.SUCCESS(
+                f'Популярность обновлена: добавлено {stats["created"]}, '
+                f'обновлено {stats["updated"]}, удалено {stats["pruned"]}'
+            ))
+            if not options['loop']:
+                break
+            rebuild = False
+            sleep(settings.TRENDING_REFRESH_INTERVAL)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'rebuild the recipes full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help='only index recipes missing from the index')
+
+    def handle(self, *args, **options):
+        updated = update_search_index(missing_only=options['missing'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов проиндексировано: {updated}'))
@@ -1,10 +1,14 @@
 from typing import List
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.utils import timezone
 
-from users.models import User
+from users.models import User, UsersFollowing
 
 MODELS_FIELDS: List[str] = ['name', 'slug', 'color', 'measurement_unit']
 REGEX_VALIDATOR_RECIPE = RegexValidator(regex=r'^[-a-zA-Z0-9_]+$')
@@ -55,6 +59,36 @@ class Ingredients(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
+class RecipesQuerySet(models.QuerySet):
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch('ingredientamount',
+                     queryset=IngredientAmount.objects.select_related(
+                         'ingredient').order_by('pk'))
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(FavoriteRecipes.objects.filter(
+                recipe_fav=OuterRef('pk'), user_fav=user,
+                is_follow_rec=True)),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                recipe_cart=OuterRef('pk'), user_cart=user,
+                is_in_shopping_cart=True)),
+            author_is_subscribed=Exists(UsersFollowing.objects.filter(
+                following=OuterRef('author'), follower=user,
+                is_follow=True)),
+        )
+
+
 class Recipes(models.Model):
 
     author = models.ForeignKey(
@@ -72,6 +106,8 @@ class Recipes(models.Model):
 
     image = models.ImageField(upload_to='recipes/images/',
                               default=None, verbose_name='Картинка')
+    image_variants = models.JSONField(default=dict, blank=True,
+                                      verbose_name='Варианты картинки')
     text = models.TextField(
         verbose_name='Описание', max_length=999,
     )
@@ -96,11 +132,28 @@ class Recipes(models.Model):
         ]
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.IntegerField(
+        default=0, editable=False, verbose_name='В избранном')
+    carts_count = models.IntegerField(
+        default=0, editable=False, verbose_name='В списках покупок')
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipesQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-created_at', )
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='recipes_created_at_id_idx'),
+            models.Index(fields=['author', '-created_at'],
+                         name='recipes_author_created_at_idx'),
+            models.Index(fields=['-favorites_count', '-created_at'],
+                         name='recipes_favorites_count_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='recipes_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f'рецепт: {self.name}, автора: {self.author}'
@@ -155,6 +208,7 @@ class ShoppingCart(models.Model):
 
     is_in_shopping_cart = models.BooleanField(default=False)
     added_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name = 'Корзина'
@@ -164,6 +218,11 @@ class ShoppingCart(models.Model):
             models.UniqueConstraint(fields=['recipe_cart', 'user_cart'],
                                     name='unique_shop_cart')
         ]
+        indexes = [
+            models.Index(fields=['user_cart', 'recipe_cart'],
+                         condition=models.Q(is_in_shopping_cart=True),
+                         name='shopcart_active_idx')
+        ]
 
     def __str__(self):
         return f'рецепт {self.recipe_cart} в корзине {self.user_cart}'
@@ -184,18 +243,89 @@ class FavoriteRecipes(models.Model):
 
     born_at = models.DateTimeField(auto_now_add=True)
 
+    activated_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
         ordering = ('-born_at', )
         constraints = [
             models.UniqueConstraint(fields=['recipe_fav', 'user_fav'],
-                                    name='unique_recipe_fav'),
-            models.CheckConstraint(check=~models.Q(
-                user_fav=models.F('recipe_fav')),
-                name='no_self_fav_recipe'
-            )
+                                    name='unique_recipe_fav')
+        ]
+        indexes = [
+            models.Index(fields=['user_fav', 'recipe_fav'],
+                         condition=models.Q(is_follow_rec=True),
+                         name='favourite_active_idx')
         ]
 
     def __str__(self):
         return self.recipe_fav.__str__()
+
+
+class RecipeTrending(models.Model):
+
+    recipe = models.OneToOneField(
+        Recipes, on_delete=models.CASCADE, primary_key=True,
+        related_name='trending', verbose_name='Рецепт'
+    )
+    score = models.FloatField(verbose_name='Рейтинг (log2, forward decay)')
+    updated_at = models.DateTimeField(verbose_name='Учтены события до')
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        ordering = ('-score', )
+        indexes = [
+            models.Index(fields=['-score'], name='recipe_trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}: {self.score}'
+
+
+class FeedEntry(models.Model):
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipes, on_delete=models.CASCADE, related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    created_at = models.DateTimeField(verbose_name='Дата рецепта')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        ordering = ('-created_at', '-recipe')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='unique_feed_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-recipe'],
+                         name='feed_user_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class FeedFanOut(models.Model):
+
+    recipe = models.OneToOneField(
+        Recipes, on_delete=models.CASCADE, primary_key=True,
+        related_name='feed_fan_out', verbose_name='Рецепт'
+    )
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Дата постановки')
+
+    class Meta:
+        verbose_name = 'Рассылка в ленты'
+        verbose_name_plural = 'Рассылки в ленты'
+        ordering = ('created_at', )
+
+    def __str__(self):
+        return f'{self.recipe} ждёт рассылки'
@@ -0,0 +1,81 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import IngredientAmount, Ingredients, Recipes, Tags
+from users.models import User
+
+
+def create_user(username: str) -> User:
+    return User.objects.create_user(
+        username=username, email=f'{username}@foodgram.test',
+        first_name='Имя', last_name='Фамилия', password='foodgram-test'
+    )
+
+
+def get_client(user=None) -> APIClient:
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def author():
+    return create_user('author')
+
+
+@pytest.fixture
+def user():
+    return create_user('reader')
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
+
+
+@pytest.fixture
+def tags():
+    return [Tags.objects.create(name=f'Тег {number}', slug=f'tag{number}',
+                                color=f'#00000{number}')
+            for number in range(3)]
+
+
+@pytest.fixture
+def ingredients():
+    return [Ingredients.objects.create(name=f'Ингредиент {number}',
+                                       measurement_unit='г')
+            for number in range(5)]
+
+
+@pytest.fixture
+def make_recipes(author, tags, ingredients):
+
+    def make_recipes(count: int, recipe_author=None):
+        recipes = []
+        for number in range(count):
+            recipe = Recipes.objects.create(
+                author=recipe_author or author, name=f'Рецепт {number}',
+                text='Описание', cooking_time=number + 1,
+                image='recipes/images/test.png'
+            )
+            recipe.tags.set(tags[:number % len(tags) + 1])
+            IngredientAmount.objects.bulk_create([
+                IngredientAmount(recipe=recipe, ingredient=ingredient,
+                                 amount=number + 1)
+                for ingredient in ingredients[:number % len(ingredients) + 1]
+            ])
+            recipes.append(recipe)
+        return recipes
+
+    return make_recipes
@@ -0,0 +1,12 @@
+import os
+
+os.environ.setdefault('DB_ENGINE', 'sqlite3')
+os.environ.setdefault('SECRET_KEY', 'foodgram-tests')
+
+from foodgram.settings import *  # noqa: E402,F401,F403
+
+REPLICA_DATABASE = None
+DATABASES['replica'] = {  # noqa: F405
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'replica.sqlite3',  # noqa: F405
+}
@@ -0,0 +1,79 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+
+from api import urls as api_urls
+from api.async_views import get_async_urlpatterns
+from api.utils.catalog import CatalogCacheMixin, get_catalog_version_key
+from recipes.models import FavoriteRecipes, Ingredients, Recipes, Tags
+
+pytestmark = pytest.mark.django_db
+
+urlpatterns = [
+    path('api/', include((
+        get_async_urlpatterns(api_urls.router_v1) + api_urls.urlpatterns,
+        api_urls.app_name
+    ))),
+]
+
+HEADERS = ('Content-Type', 'Allow', 'Vary', 'ETag', 'Cache-Control',
+           'WWW-Authenticate')
+
+
+def reset_cache(monkeypatch):
+    cache.clear()
+    cache.set_many({get_catalog_version_key(model): 1
+                    for model in (Recipes, Tags, Ingredients)}, None)
+    monkeypatch.setattr(CatalogCacheMixin, 'catalog_payloads', {})
+
+
+def get_sync(url: str, authorization: str):
+    extra = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+    return Client().get(url, **extra)
+
+
+def get_async(url: str, authorization: str):
+    extra = {'authorization': authorization} if authorization else {}
+    with override_settings(ROOT_URLCONF=__name__):
+        return async_to_sync(AsyncClient().get)(url, **extra)
+
+
+def describe(response):
+    return (response.status_code, response.content,
+            [response.get(header) for header in HEADERS])
+
+
+@pytest.fixture
+def tokens(user, make_recipes):
+    recipes = make_recipes(8)
+    FavoriteRecipes.objects.create(user_fav=user, recipe_fav=recipes[0],
+                                   is_follow_rec=True)
+    key = Token.objects.create(user=user).key
+    return {'anonymous': '', 'user': f'Token {key}',
+            'invalid': 'Token invalid'}
+
+
+@pytest.mark.parametrize('url', [
+    '/api/tags/', '/api/tags/{tag}/', '/api/tags/0/', '/api/tags/abc/',
+    '/api/ingredients/', '/api/ingredients/{ingredient}/',
+    '/api/ingredients/?name=Ингр&limit=2',
+    '/api/recipes/', '/api/recipes/?limit=3&page=2', '/api/recipes/?page=9',
+    '/api/recipes/?cursor=&limit=3', '/api/recipes/?cursor=zzz',
+    '/api/recipes/?tags=tag1', '/api/recipes/?is_favorited=1',
+    '/api/recipes/?ordering=-favorites_count&cursor=',
+    '/api/recipes/{recipe}/', '/api/recipes/0/', '/api/users/me/',
+])
+@pytest.mark.parametrize('auth', ['anonymous', 'user', 'invalid'])
+def test_async_views_match_sync_views(tokens, tags, ingredients, monkeypatch,
+                                      url, auth):
+    url = url.format(tag=tags[0].pk, ingredient=ingredients[0].pk,
+                     recipe=Recipes.objects.first().pk)
+    responses = []
+    for get in (get_sync, get_async):
+        reset_cache(monkeypatch)
+        responses.append([describe(get(url, tokens[auth]))
+                          for _ in range(2)])
+    assert responses[0] == responses[1]
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+import pytest
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.utils import bulk
+from api.utils.counters import set_toggle
+from recipes.models import FavoriteRecipes, Recipes, ShoppingCart
+from tests.conftest import get_client
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def assert_counters_match():
+    recipes = Recipes.objects.annotate(actual=Count(
+        'favourite', filter=Q(favourite__is_follow_rec=True)))
+    assert all(recipe.favorites_count == recipe.actual for recipe in recipes)
+
+
+def test_recipe_with_user_id_can_be_favorited(make_recipes):
+    recipes = make_recipes(3)
+    user_ids = set(User.objects.values_list('pk', flat=True))
+    recipe = next(recipe for recipe in recipes if recipe.pk not in user_ids)
+    user = User.objects.create(pk=recipe.pk, username='namesake',
+                               email='namesake@foodgram.test')
+    own, = make_recipes(1, recipe_author=user)
+    response = get_client(user).post('/api/recipes/bulk_favorite/', {
+        'ids': [recipe.pk for recipe in recipes] + [own.pk]}, format='json')
+
+    assert response.status_code == 200
+    statuses = {item['id']: item['status']
+                for item in response.json()['results']}
+    assert statuses.pop(own.pk) == bulk.BULK_FORBIDDEN
+    assert statuses[user.pk] == bulk.BULK_ADDED
+    assert set(statuses.values()) == {bulk.BULK_ADDED}
+    assert_counters_match()
+
+
+def test_concurrent_insert_is_not_counted_twice(make_recipes, user,
+                                                user_client, monkeypatch):
+    recipe, other = make_recipes(2)
+    bulk_create = FavoriteRecipes.objects.bulk_create
+
+    def create_after_concurrent_favorite(objects, **kwargs):
+        set_toggle(FavoriteRecipes, True, user_fav=user, recipe_fav=recipe)
+        return bulk_create(objects, **kwargs)
+
+    monkeypatch.setattr(FavoriteRecipes.objects, 'bulk_create',
+                        create_after_concurrent_favorite)
+    response = user_client.post('/api/recipes/bulk_favorite/', {
+        'ids': [recipe.pk, other.pk]}, format='json')
+
+    assert response.json()['results'] == [
+        {'id': recipe.pk, 'status': bulk.BULK_UNCHANGED},
+        {'id': other.pk, 'status': bulk.BULK_ADDED},
+    ]
+    assert_counters_match()
+
+
+def test_bulk_remove_updates_counters(make_recipes, user, user_client):
+    recipes = make_recipes(3)
+    for recipe in recipes[:2]:
+        set_toggle(FavoriteRecipes, True, user_fav=user, recipe_fav=recipe)
+
+    response = user_client.delete('/api/recipes/bulk_favorite/', {
+        'ids': [recipe.pk for recipe in recipes]}, format='json')
+
+    assert [item['status'] for item in response.json()['results']] == [
+        bulk.BULK_REMOVED, bulk.BULK_REMOVED, bulk.BULK_UNCHANGED]
+    assert_counters_match()
+
+
+def test_bulk_readd_moves_activated_at(make_recipes, user, user_client):
+    recipe, = make_recipes(1)
+    set_toggle(ShoppingCart, True, user_cart=user, recipe_cart=recipe)
+    set_toggle(ShoppingCart, False, user_cart=user, recipe_cart=recipe)
+    ShoppingCart.objects.update(
+        activated_at=timezone.now() - timedelta(days=30))
+    activated_at = ShoppingCart.objects.get().activated_at
+
+    response = user_client.post('/api/recipes/bulk_shopping_cart/', {
+        'ids': [recipe.pk]}, format='json')
+
+    assert response.json()['results'][0]['status'] == bulk.BULK_ADDED
+    assert ShoppingCart.objects.get().activated_at > activated_at
@@ -0,0 +1,72 @@
+import pytest
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.test import APIClient
+
+from api.utils import catalog
+from api.utils.catalog import bump_catalog_version, get_catalog_version
+from api.utils.ingredient_search import ingredient_search_index
+from recipes.models import Ingredients
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def use_cache(monkeypatch):
+
+    def use_cache(client):
+        monkeypatch.setattr(catalog, 'cache', client)
+
+    return use_cache
+
+
+def test_default_cache_does_not_use_the_database():
+    assert isinstance(caches['default'], LocMemCache)
+
+
+def test_catalog_version_hit_runs_no_queries(tags, django_assert_num_queries):
+    client = APIClient()
+    etag = client.get('/api/tags/')['ETag']
+
+    with django_assert_num_queries(0):
+        assert client.get('/api/tags/').status_code == 200
+        response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_recipes_list_cache_hit_runs_no_queries(make_recipes,
+                                                django_assert_num_queries):
+    make_recipes(3)
+    client = APIClient()
+    expected = client.get('/api/recipes/').json()
+
+    with django_assert_num_queries(0):
+        assert client.get('/api/recipes/').json() == expected
+
+
+def test_version_bump_is_seen_by_another_cache_client(use_cache):
+    worker = caches.create_connection('default')
+    loader = caches.create_connection('default')
+
+    use_cache(worker)
+    version = get_catalog_version(Ingredients)
+    use_cache(loader)
+    bumped = bump_catalog_version(Ingredients)
+    use_cache(worker)
+
+    assert bumped != version
+    assert get_catalog_version(Ingredients) == bumped
+
+
+def test_ingredient_index_rebuilds_after_bump_elsewhere(ingredients,
+                                                        use_cache):
+    use_cache(caches.create_connection('default'))
+    assert len(ingredient_search_index.search('ингредиент')) == 5
+
+    Ingredients.objects.bulk_create([
+        Ingredients(name='Ингредиент новый', measurement_unit='г')])
+    use_cache(caches.create_connection('default'))
+    bump_catalog_version(Ingredients)
+
+    use_cache(caches.create_connection('default'))
+    assert len(ingredient_search_index.search('ингредиент')) == 6
@@ -0,0 +1,51 @@
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.utils import catalog, replica
+from api.utils.catalog import CatalogCacheMixin
+from api.utils.replica import can_read_replica, pin_to_primary
+from recipes.models import Tags
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def start_worker(monkeypatch):
+
+    def start_worker():
+        client = caches.create_connection('default')
+        monkeypatch.setattr(catalog, 'cache', client)
+        monkeypatch.setattr(replica, 'cache', client)
+        monkeypatch.setattr(CatalogCacheMixin, 'catalog_payloads', {})
+
+    return start_worker
+
+
+def test_workers_share_catalog_etag(tags, start_worker,
+                                    django_capture_on_commit_callbacks):
+    start_worker()
+    first = APIClient().get('/api/tags/')
+    start_worker()
+    second = APIClient().get('/api/tags/')
+    assert first['ETag'] == second['ETag']
+    assert first.json() == second.json()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Tags.objects.create(name='Новый', slug='new', color='#FFFFFF')
+
+    start_worker()
+    response = APIClient().get('/api/tags/',
+                               HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 200
+    assert response['ETag'] != first['ETag']
+    assert len(response.json()) == len(tags) + 1
+
+
+@override_settings(REPLICA_DATABASE='replica')
+def test_workers_share_replica_pins(user, start_worker):
+    start_worker()
+    pin_to_primary(user)
+    start_worker()
+    assert not can_read_replica(user)
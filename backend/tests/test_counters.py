@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from api.utils.counters import set_toggle
+from recipes.models import FavoriteRecipes, ShoppingCart
+from tests.conftest import create_user
+from users.models import User, UsersFollowing
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('model, user_field, recipe_field', [
+    (FavoriteRecipes, 'user_fav', 'recipe_fav'),
+    (ShoppingCart, 'user_cart', 'recipe_cart'),
+])
+def test_reactivation_moves_activated_at(make_recipes, user, model,
+                                         user_field, recipe_field):
+    recipe, = make_recipes(1)
+    lookup = {user_field: user, recipe_field: recipe}
+    set_toggle(model, True, **lookup)
+    model.objects.update(activated_at=timezone.now() - timedelta(days=30))
+    activated_at = model.objects.get().activated_at
+
+    set_toggle(model, False, **lookup)
+    assert model.objects.get().activated_at == activated_at
+    set_toggle(model, True, **lookup)
+    assert model.objects.get().activated_at > activated_at
+
+
+def test_subscriptions_read_recipes_count_from_counter(
+        make_recipes, user, user_client, django_assert_num_queries):
+    authors = [create_user(f'author{number}') for number in range(3)]
+    for number, author in enumerate(authors):
+        make_recipes(number + 1, recipe_author=author)
+        set_toggle(UsersFollowing, True, follower=user, following=author)
+    User.objects.filter(pk=authors[0].pk).update(recipes_count=42)
+    user_client.get('/api/users/subscriptions/')
+
+    with django_assert_num_queries(3):
+        response = user_client.get('/api/users/subscriptions/')
+
+    counts = {row['id']: row['recipes_count']
+              for row in response.data['results']}
+    assert counts == {authors[0].pk: 42, authors[1].pk: 2, authors[2].pk: 3}
+    assert 'followers_count' not in response.data['results'][0]
+
+
+def test_recipes_ordered_by_favorites_counter(make_recipes, user,
+                                              user_client):
+    recipes = make_recipes(3)
+    set_toggle(FavoriteRecipes, True, user_fav=user, recipe_fav=recipes[0])
+
+    response = user_client.get('/api/recipes/?ordering=-favorites_count')
+
+    assert [row['id'] for row in response.data['results']] == [
+        recipes[0].pk, recipes[2].pk, recipes[1].pk]
+    assert 'favorites_count' not in response.data['results'][0]
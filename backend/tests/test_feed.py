@@ -0,0 +1,68 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+
+from api.utils import feed
+from api.utils.counters import set_toggle
+from recipes.models import FeedEntry, FeedFanOut
+from users.models import UsersFollowing
+
+
+@pytest.fixture
+def feed_executor(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(feed, 'feed_executor', executor)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_new_recipe_is_fanned_out_in_background(feed_executor, author, user,
+                                                make_recipes):
+    set_toggle(UsersFollowing, True, follower=user, following=author)
+
+    recipe, = make_recipes(1)
+    feed_executor.shutdown(wait=True)
+
+    assert list(FeedEntry.objects.filter(user=user).values_list(
+        'recipe_id', flat=True)) == [recipe.pk]
+    assert not FeedFanOut.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fan_out_lost_with_the_process_is_delivered_by_command(
+        monkeypatch, author, user, make_recipes):
+    monkeypatch.setattr(feed, 'feed_executor',
+                        SimpleNamespace(submit=lambda *args: None))
+    set_toggle(UsersFollowing, True, follower=user, following=author)
+
+    recipe, = make_recipes(1)
+    assert not FeedEntry.objects.exists()
+    stdout = StringIO()
+    call_command('fan_out_recipes', stdout=stdout)
+
+    assert 'разослано в ленты: 1, с ошибкой: 0' in stdout.getvalue()
+    assert list(FeedEntry.objects.filter(user=user).values_list(
+        'recipe_id', flat=True)) == [recipe.pk]
+    assert not FeedFanOut.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fan_out_failure_is_logged(feed_executor, monkeypatch, caplog,
+                                   make_recipes):
+    def fail(recipe):
+        raise RuntimeError('fan-out failed')
+
+    monkeypatch.setattr(feed, 'fan_out_recipe', fail)
+    with caplog.at_level(logging.ERROR, logger=feed.__name__):
+        recipe, = make_recipes(1)
+        feed_executor.shutdown(wait=True)
+
+    record, = caplog.records
+    assert str(recipe.pk) in record.getMessage()
+    assert record.exc_info[0] is RuntimeError
+    assert FeedFanOut.objects.filter(recipe=recipe).exists()
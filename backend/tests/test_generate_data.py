@@ -0,0 +1,26 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F, Q
+
+from recipes.models import Recipes
+from users.models import User
+
+
+@pytest.mark.django_db
+def test_generate_data_runs_on_sqlite(tags, ingredients):
+    call_command('generate_data', users=20, recipes_per_user=3,
+                 ingredients_per_recipe=(1, 3), favorites_per_user=5,
+                 cart_per_user=2, follows_per_user=3, seed=1,
+                 stdout=StringIO())
+
+    users = User.objects.filter(username__startswith='bench_').annotate(
+        recipes_total=Count('recipes', distinct=True),
+        followers_total=Count('following', distinct=True,
+                              filter=Q(following__is_follow=True)),
+    )
+    assert users.count() == 20
+    assert not users.exclude(recipes_count=F('recipes_total')).exists()
+    assert not users.exclude(followers_count=F('followers_total')).exists()
+    assert not Recipes.objects.filter(ingredientamount__isnull=True).exists()
@@ -0,0 +1,25 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api.utils import images
+
+
+@pytest.mark.django_db(transaction=True)
+def test_image_variants_failure_is_logged(monkeypatch, caplog, make_recipes):
+    def fail(image_name):
+        raise OSError('broken image')
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(images, 'image_executor', executor)
+    monkeypatch.setattr(images, 'build_image_variants', fail)
+    recipe, = make_recipes(1)
+
+    with caplog.at_level(logging.ERROR, logger=images.__name__):
+        images.schedule_image_variants(recipe)
+        executor.shutdown(wait=True)
+
+    record, = caplog.records
+    assert str(recipe.pk) in record.getMessage()
+    assert record.exc_info[0] is OSError
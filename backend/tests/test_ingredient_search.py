@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.utils.ingredient_search import ingredient_search_index
+from recipes.models import Ingredients
+
+pytestmark = pytest.mark.django_db
+
+
+def search_filter_ids(query: str) -> set:
+    request = Request(APIRequestFactory().get('/api/ingredients/',
+                                              {'search': query}))
+    return set(SearchFilter().filter_queryset(
+        request, Ingredients.objects.all(),
+        SimpleNamespace(search_fields=['name'])
+    ).values_list('id', flat=True))
+
+
+@pytest.fixture
+def catalog():
+    return Ingredients.objects.bulk_create([
+        Ingredients(name=name, measurement_unit='г') for name in (
+            'сыр твёрдый', 'сыр плавленый', 'твёрдый тофу', 'сырок',
+            'масло сливочное', 'сливочный сыр', 'масло оливковое',
+        )
+    ])
+
+
+@pytest.mark.parametrize('query', [
+    'сыр', 'сыр твёрдый', 'твёрдый сыр', 'сыр,плавленый', 'мас сл',
+    'сливочн мас', 'ы', 'сыр тофу', 'нет такого',
+])
+def test_index_matches_every_token_like_search_filter(catalog, query):
+    found = ingredient_search_index.search(query)
+    assert {ingredient['id'] for ingredient in found} == (
+        search_filter_ids(query))
+
+
+def test_prefix_matches_come_first(catalog):
+    response = APIClient().get('/api/ingredients/', {'name': 'сыр'})
+    assert [ingredient['name'] for ingredient in response.json()] == [
+        'сыр плавленый', 'сыр твёрдый', 'сырок', 'сливочный сыр']
@@ -0,0 +1,57 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from recipes.models import Ingredients, Tags
+
+pytestmark = pytest.mark.django_db
+
+COPY_MODES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='COPY needs PostgreSQL'))]
+
+
+def load_data(*args) -> str:
+    stdout = StringIO()
+    call_command('load_data', *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+@pytest.mark.parametrize('copy', COPY_MODES)
+def test_load_data_reports_real_counts_on_reload(copy):
+    args = ['--copy'] if copy else []
+    output = load_data(*args)
+    total = Ingredients.objects.count()
+    assert total > 2000
+    assert f'Строк: {total}, добавлено: {total}, обновлено: 0' in output
+    assert 'Строк: 3, добавлено: 3, обновлено: 0' in output
+
+    output = load_data(*args)
+    assert (f'Строк: {total}, добавлено: 0, обновлено: 0, '
+            f'пропущено: {total}') in output
+    assert Ingredients.objects.count() == total
+
+
+@pytest.mark.parametrize('copy', COPY_MODES)
+def test_load_data_upserts_tags_on_every_unique_key(tmp_path, copy):
+    Tags.objects.bulk_create([
+        Tags(name='завтрак', color='#DED714', slug='breakfast'),
+        Tags(name='обед', color='#E06218', slug='dinner'),
+    ])
+    path = tmp_path / 'tags.csv'
+    path.write_text('завтрак,#000001,morning\n'
+                    'обед,#DED714,dinner\n'
+                    'ужин,#2839F7,lunch\n'
+                    'полдник,#2839F7,snack\n', encoding='utf-8')
+
+    output = load_data('--model', 'tags', '--file', str(path),
+                       *(['--copy'] if copy else []))
+
+    assert ('Строк: 4, добавлено: 1, обновлено: 1, пропущено: 2'
+            in output)
+    assert set(Tags.objects.values_list('name', 'color', 'slug')) == {
+        ('завтрак', '#000001', 'morning'),
+        ('обед', '#E06218', 'dinner'),
+        ('ужин', '#2839F7', 'lunch'),
+    }
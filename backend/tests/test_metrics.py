@@ -0,0 +1,34 @@
+import re
+
+import pytest
+from django.test import override_settings
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def get_serializer_duration(response) -> float:
+    return float(re.search(r'serializer;dur=([\d.]+)',
+                           response['Server-Timing']).group(1))
+
+
+def test_metrics_are_disabled_by_default(tags):
+    response = APIClient().get('/api/tags/')
+    assert 'Server-Timing' not in response
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+def test_view_serializers_are_timed_without_patching_drf():
+    User.objects.bulk_create([
+        User(username=f'user{number}', email=f'user{number}@foodgram.test',
+             first_name='Имя', last_name='Фамилия', password='!')
+        for number in range(50)
+    ])
+
+    response = APIClient().get('/api/users/?limit=50')
+
+    assert get_serializer_duration(response) > 0
+    assert not hasattr(BaseSerializer.data.fget, 'timed')
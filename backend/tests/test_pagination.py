@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.conftest import get_client
+
+pytestmark = pytest.mark.django_db
+
+
+def test_cursor_pages_walk_all_recipes(make_recipes, user_client):
+    recipes = make_recipes(7)
+    url, seen = '/api/recipes/?cursor=&limit=3', []
+    while url:
+        response = user_client.get(url)
+        assert response.status_code == 200
+        seen += [recipe['id'] for recipe in response.data['results']]
+        url = response.data['next']
+
+    assert seen == [recipe.pk for recipe in reversed(recipes)]
+
+
+def test_cursor_query_count_does_not_grow_with_limit(
+        make_recipes, user, django_assert_num_queries):
+    make_recipes(30)
+    client = get_client(user)
+    client.get('/api/recipes/?cursor=&limit=1')
+
+    with CaptureQueriesContext(connection) as context:
+        client.get('/api/recipes/?cursor=&limit=6')
+    queries = len(context.captured_queries)
+    with django_assert_num_queries(queries):
+        client.get('/api/recipes/?cursor=&limit=100')
+
+
+def test_invalid_cursor_is_not_found(user_client):
+    assert user_client.get('/api/recipes/?cursor=bad').status_code == 404
+
+
+@pytest.mark.parametrize('url', [
+    '/api/recipes/?cursor=&ordering=favorites_count',
+    '/api/recipes/trending/?cursor=',
+])
+def test_cursor_rejects_custom_ordering(make_recipes, user_client, url):
+    make_recipes(1)
+    response = user_client.get(url)
+    assert response.status_code == 400
+    assert 'cursor' in response.data
@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import FavoriteRecipes, ShoppingCart
+from tests.conftest import get_client
+
+pytestmark = pytest.mark.django_db
+
+
+def count_queries(client, url: str) -> int:
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.fixture
+def recipes(make_recipes, user):
+    recipes = make_recipes(30)
+    for recipe in recipes[::3]:
+        FavoriteRecipes.objects.create(user_fav=user, recipe_fav=recipe,
+                                       is_follow_rec=True)
+        ShoppingCart.objects.create(user_cart=user, recipe_cart=recipe,
+                                    is_in_shopping_cart=True)
+    return recipes
+
+
+@pytest.mark.parametrize('params', [
+    'anonymous', 'authenticated', 'is_favorited=1'])
+def test_recipes_list_query_count_does_not_grow_with_limit(
+        recipes, user, django_assert_num_queries, params):
+    client = get_client(None if params == 'anonymous' else user)
+    client.get(f'/api/recipes/?{params}&limit=1')
+
+    queries = count_queries(client, f'/api/recipes/?{params}&limit=6')
+    with django_assert_num_queries(queries):
+        response = client.get(f'/api/recipes/?{params}&limit=100')
+    assert len(response.data['results']) > 6
+
+
+def test_recipe_detail_query_count_does_not_depend_on_recipe(
+        recipes, user_client, django_assert_num_queries):
+    user_client.get(f'/api/recipes/{recipes[0].pk}/')
+
+    queries = count_queries(user_client, f'/api/recipes/{recipes[0].pk}/')
+    with django_assert_num_queries(queries):
+        user_client.get(f'/api/recipes/{recipes[-1].pk}/')
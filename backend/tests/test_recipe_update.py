@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientAmount
+from tests.conftest import get_client
+
+pytestmark = pytest.mark.django_db
+
+
+def get_amounts(recipe):
+    return dict(IngredientAmount.objects.filter(recipe=recipe).values_list(
+        'ingredient_id', 'amount'))
+
+
+@pytest.fixture
+def recipe(make_recipes):
+    return make_recipes(3)[-1]
+
+
+def test_patch_applies_ingredient_diff(recipe, author, ingredients):
+    kept, changed, removed = ingredients[:3]
+    rows = dict(IngredientAmount.objects.filter(recipe=recipe).values_list(
+        'ingredient_id', 'pk'))
+
+    response = get_client(author).patch(f'/api/recipes/{recipe.pk}/', {
+        'ingredients': [
+            {'id': kept.pk, 'amount': 3},
+            {'id': changed.pk, 'amount': 5},
+            {'id': ingredients[3].pk, 'amount': 2},
+            {'id': ingredients[3].pk, 'amount': 4},
+        ]
+    }, format='json')
+
+    assert response.status_code == 200
+    assert get_amounts(recipe) == {kept.pk: 3, changed.pk: 5,
+                                   ingredients[3].pk: 6}
+    assert IngredientAmount.objects.get(
+        recipe=recipe, ingredient=kept).pk == rows[kept.pk]
+    assert IngredientAmount.objects.get(
+        recipe=recipe, ingredient=changed).pk == rows[changed.pk]
+    assert not IngredientAmount.objects.filter(recipe=recipe,
+                                               ingredient=removed).exists()
+
+
+def test_patch_without_ingredients_does_not_write_them(recipe, author):
+    amounts = get_amounts(recipe)
+    table = IngredientAmount._meta.db_table
+
+    with CaptureQueriesContext(connection) as context:
+        response = get_client(author).patch(
+            f'/api/recipes/{recipe.pk}/', {'name': 'Новое название'},
+            format='json')
+
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Новое название'
+    assert get_amounts(recipe) == amounts
+    assert not [query['sql'] for query in context.captured_queries
+                if table in query['sql']
+                and not query['sql'].startswith('SELECT')]
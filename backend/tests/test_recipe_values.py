@@ -0,0 +1,76 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.serializers import RecipeGetSerializer, UserRecipeSerializer
+from api.utils.counters import set_toggle
+from api.utils.recipe_values import serialize_recipes
+from recipes.models import FavoriteRecipes, Recipes, ShoppingCart
+from tests.conftest import create_user
+from users.models import UsersFollowing
+
+pytestmark = pytest.mark.django_db
+
+
+def get_request(user) -> Request:
+    request = APIRequestFactory().get('/api/recipes/')
+    force_authenticate(request, user)
+    return Request(request)
+
+
+@pytest.fixture
+def recipes(make_recipes, author, user):
+    recipes = make_recipes(6)
+    recipes += make_recipes(3, recipe_author=create_user('other'))
+    for recipe in recipes[::2]:
+        set_toggle(FavoriteRecipes, True, user_fav=user, recipe_fav=recipe)
+    for recipe in recipes[::3]:
+        set_toggle(ShoppingCart, True, user_cart=user, recipe_cart=recipe)
+    set_toggle(UsersFollowing, True, follower=user, following=author)
+    return recipes
+
+
+@pytest.mark.parametrize('authenticated', [False, True])
+def test_serialize_recipes_matches_recipe_serializer(recipes, user,
+                                                     authenticated):
+    request = get_request(user if authenticated else AnonymousUser())
+    queryset = Recipes.objects.with_related().with_user_flags(request.user)
+
+    expected = RecipeGetSerializer(
+        queryset.all(), many=True, context={'request': request}).data
+    actual = serialize_recipes(queryset.all(), request)
+
+    renderer = JSONRenderer()
+    assert renderer.render(actual) == renderer.render(expected)
+    if not authenticated:
+        recipes = []
+    assert {recipe['id'] for recipe in actual if recipe['is_favorited']} == {
+        recipe.pk for recipe in recipes[::2]}
+    assert {recipe['id'] for recipe in actual
+            if recipe['is_in_shopping_cart']} == {
+        recipe.pk for recipe in recipes[::3]}
+    assert {recipe['author']['id'] for recipe in actual
+            if recipe['author']['is_subscribed']} == {
+        recipe.author_id for recipe in recipes[:1]}
+
+
+def test_subscriptions_recipes_limit_matches_recipe_list(recipes, author,
+                                                         user_client):
+    response = user_client.get('/api/users/subscriptions/?recipes_limit=2')
+    assert response.status_code == 200
+    subscription, = response.data['results']
+    assert subscription['id'] == author.pk
+    assert subscription['is_subscribed'] is True
+
+    expected = UserRecipeSerializer(
+        Recipes.objects.filter(author=author)[:2], many=True).data
+    assert subscription['recipes'] == expected
+    fields = set(UserRecipeSerializer.Meta.fields)
+    listed = serialize_recipes(
+        Recipes.objects.filter(author=author).with_user_flags(
+            response.wsgi_request.user)[:2], None)
+    assert [{key: recipe[key] for key in fields} for recipe in listed] == [
+        {key: recipe[key] for key in fields}
+        for recipe in subscription['recipes']]
@@ -0,0 +1,56 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.utils.catalog import get_catalog_version
+from api.utils.recipes_cache import get_recipes_list_version
+from recipes.models import Recipes, Tags
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+
+    def commit(func):
+        with django_capture_on_commit_callbacks(execute=True):
+            func()
+
+    return commit
+
+
+def test_login_keeps_recipes_version(user, commit):
+    version = get_catalog_version(Recipes)
+    commit(lambda: APIClient().post('/api/auth/token/login/', {
+        'email': user.email, 'password': 'foodgram-test'}))
+    assert user.auth_token
+    assert get_catalog_version(Recipes) == version
+
+
+def test_author_profile_change_bumps_recipes_version(author, commit):
+    version = get_catalog_version(Recipes)
+    author.first_name = 'Другое'
+    commit(lambda: author.save(update_fields=['first_name']))
+    assert get_catalog_version(Recipes) != version
+
+
+def test_tag_change_invalidates_list_only_through_its_version(tags, commit):
+    recipes_version = get_catalog_version(Recipes)
+    list_version = get_recipes_list_version()
+    tags[0].name = 'Переименован'
+    commit(lambda: tags[0].save())
+    assert get_catalog_version(Recipes) == recipes_version
+    assert get_recipes_list_version() != list_version
+
+
+def test_renamed_tag_is_not_served_from_cached_list(make_recipes, tags,
+                                                    commit):
+    make_recipes(1)
+    client = APIClient()
+    assert client.get('/api/recipes/').json()['results'][0]['tags']
+
+    tag = Tags.objects.get(pk=tags[0].pk)
+    tag.name = 'Переименован'
+    commit(tag.save)
+    names = [item['name'] for item
+             in client.get('/api/recipes/').json()['results'][0]['tags']]
+    assert names == ['Переименован']
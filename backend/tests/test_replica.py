@@ -0,0 +1,59 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from api.utils.replica import ReplicaRouter, get_pin_key, replica_reads
+from recipes.models import Recipes
+from tests.conftest import get_client
+
+pytestmark = [
+    pytest.mark.django_db(databases=['default', 'replica']),
+    pytest.mark.usefixtures('replica'),
+]
+
+
+@pytest.fixture
+def replica():
+    with override_settings(REPLICA_DATABASE='replica'):
+        yield
+
+
+def get_recipes_count(client) -> int:
+    response = client.get('/api/recipes/')
+    assert response.status_code == 200
+    return response.json()['count']
+
+
+def test_router_sends_only_marked_reads_to_replica():
+    router = ReplicaRouter()
+    assert router.db_for_read(Recipes) is None
+    token = replica_reads.set(True)
+    try:
+        assert router.db_for_read(Recipes) == 'replica'
+        assert router.db_for_write(Recipes) == 'default'
+    finally:
+        replica_reads.reset(token)
+
+
+def test_safe_reads_use_replica(make_recipes, user_client):
+    make_recipes(2)
+    assert Recipes.objects.using('replica').count() == 0
+
+    assert get_recipes_count(get_client()) == 0
+    assert get_recipes_count(user_client) == 0
+
+
+def test_writes_pin_user_to_primary(make_recipes, user, user_client):
+    recipe, = make_recipes(1)
+
+    response = user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert response.status_code == 200
+    assert cache.get(get_pin_key(user)) is not None
+    assert get_recipes_count(get_client()) == 0
+
+    response = user_client.get('/api/recipes/')
+    assert response.json()['count'] == 1
+    assert response.json()['results'][0]['is_favorited'] is True
+
+    cache.clear()
+    assert get_recipes_count(user_client) == 0
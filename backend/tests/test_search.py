@@ -0,0 +1,44 @@
+import pytest
+from rest_framework.test import APIClient
+
+from recipes.models import Recipes
+
+pytestmark = pytest.mark.django_db
+
+
+def search(value: str, **params):
+    response = APIClient().get('/api/recipes/', {'search': value, **params})
+    return response.status_code, [recipe['name'] for recipe
+                                  in response.json().get('results', [])]
+
+
+@pytest.fixture
+def recipes(author):
+    return [Recipes.objects.create(author=author, name=name, text=text,
+                                   cooking_time=10,
+                                   image='recipes/images/test.png')
+            for name, text in (('Борщ', 'Свекла и капуста'),
+                               ('Салат', 'Свекла и морковь'),
+                               ('Омлет', 'Яйца и молоко'))]
+
+
+def test_search_matches_every_token(recipes):
+    assert search('Свекла') == (200, ['Салат', 'Борщ'])
+    assert search('Свекла капуста') == (200, ['Борщ'])
+    assert search('капуста молоко') == (200, [])
+
+
+def test_search_follows_recipe_changes(recipes,
+                                       django_capture_on_commit_callbacks):
+    borsch, salad, omelet = recipes
+    with django_capture_on_commit_callbacks(execute=True):
+        borsch.text = 'Томаты и капуста'
+        borsch.save()
+        omelet.name = 'Свекла запечённая'
+        omelet.save(update_fields=['name'])
+
+    assert search('Свекла') == (200, ['Свекла запечённая', 'Салат'])
+
+
+def test_search_rejects_cursor(recipes):
+    assert search('Свекла', cursor='')[0] == 400
@@ -0,0 +1,44 @@
+import pytest
+from django.core.management import call_command
+
+from recipes.models import FavoriteRecipes, ShoppingCart
+from users.models import UsersFollowing
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipe(make_recipes):
+    return make_recipes(1)[0]
+
+
+def get_urls(recipe, author):
+    return [f'/api/recipes/{recipe.pk}/favorite/',
+            f'/api/recipes/{recipe.pk}/shopping_cart/',
+            f'/api/users/{author.pk}/subscribe/']
+
+
+def test_delete_of_removed_toggle_succeeds(recipe, author, user_client):
+    for url in get_urls(recipe, author):
+        assert user_client.post(url).status_code == 200
+        assert user_client.delete(url).status_code == 200
+        assert user_client.delete(url).status_code == 200
+
+
+def test_delete_of_missing_toggle_is_not_found(recipe, author, user_client):
+    for url in get_urls(recipe, author):
+        assert user_client.delete(url).status_code == 404
+
+
+def test_compact_toggles_reports_deleted_rows(recipe, author, user_client,
+                                              capsys):
+    for url in get_urls(recipe, author):
+        user_client.post(url)
+        user_client.delete(url)
+
+    call_command('compact_toggles', pause=0)
+
+    output = capsys.readouterr().out
+    for model in (FavoriteRecipes, ShoppingCart, UsersFollowing):
+        assert not model.objects.exists()
+        assert f'{model._meta.db_table}: удалено 1' in output
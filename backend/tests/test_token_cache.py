@@ -0,0 +1,77 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.utils import token_cache as token_cache_module
+from api.utils.token_cache import TokenCache, get_token_cache_key
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def token(user):
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def workers():
+    return TokenCache(), TokenCache()
+
+
+def test_local_hit_runs_no_queries(token, django_assert_num_queries):
+    worker = TokenCache()
+    worker.get(token.key)
+
+    with django_assert_num_queries(0):
+        assert worker.get(token.key).user == token.user
+
+
+def test_deleted_token_is_rejected_by_other_workers(token, workers):
+    key = token.key
+    for worker in workers:
+        assert worker.get(key) is not None
+
+    token.delete()
+
+    for worker in workers:
+        assert worker.get(key) is None
+
+
+def test_deactivated_user_is_seen_by_other_workers(token, user, workers):
+    for worker in workers:
+        assert worker.get(token.key).user.is_active
+
+    user.is_active = False
+    user.save()
+
+    for worker in workers:
+        assert not worker.get(token.key).user.is_active
+
+
+def test_expired_entry_is_reloaded(token, monkeypatch,
+                                   django_assert_num_queries):
+    worker = TokenCache()
+    worker.get(token.key)
+    now = token_cache_module.monotonic()
+    monkeypatch.setattr(token_cache_module, 'monotonic', lambda: now + 3600)
+
+    with django_assert_num_queries(1):
+        assert worker.get(token.key) is not None
+
+
+@override_settings(TOKEN_AUTH_SHARED_CACHE=True)
+def test_shared_tier_keeps_only_auth_fields(token, user, workers,
+                                            django_assert_num_queries):
+    first, second = workers
+    key = token.key
+    first.get(key)
+
+    assert cache.get(get_token_cache_key(key)) == (user.pk, True)
+    with django_assert_num_queries(1):
+        shared = second.get(key)
+    assert shared.user == user
+
+    token.delete()
+    assert cache.get(get_token_cache_key(key)) is None
+    assert second.get(key) is None
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from api.utils.trending import refresh_trending
+from recipes.models import FavoriteRecipes, RecipeTrending
+
+pytestmark = pytest.mark.django_db
+
+
+def test_trending_counts_latest_activation(make_recipes, user):
+    recipe, = make_recipes(1)
+    FavoriteRecipes.objects.create(user_fav=user, recipe_fav=recipe,
+                                   is_follow_rec=True)
+    year_ago = timezone.now() - timedelta(days=365)
+    FavoriteRecipes.objects.update(born_at=year_ago, activated_at=year_ago)
+    refresh_trending(now=timezone.now() + timedelta(minutes=1))
+    assert not RecipeTrending.objects.exists()
+
+    FavoriteRecipes.objects.update(activated_at=timezone.now())
+    refresh_trending(now=timezone.now() + timedelta(minutes=1))
+    assert RecipeTrending.objects.filter(recipe=recipe).exists()
@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.utils.counters import set_toggle
+from tests.conftest import create_user
+from users.models import UsersFollowing
+
+pytestmark = pytest.mark.django_db
+
+
+def test_users_me_runs_one_query(user, user_client,
+                                 django_assert_num_queries):
+    for number in range(3):
+        set_toggle(UsersFollowing, True, follower=user,
+                   following=create_user(f'author{number}'))
+    user_client.get('/api/users/me/')
+
+    with django_assert_num_queries(1):
+        response = user_client.get('/api/users/me/')
+    assert response.status_code == 200
+    assert response.data['id'] == user.pk
+    assert response.data['is_subscribed'] is False
+
+
+def test_users_list_query_count_does_not_grow_with_limit(
+        user, user_client, django_assert_num_queries):
+    for number in range(8):
+        set_toggle(UsersFollowing, number % 2 == 0, follower=user,
+                   following=create_user(f'author{number}'))
+    user_client.get('/api/users/?limit=1')
+
+    with CaptureQueriesContext(connection) as context:
+        user_client.get('/api/users/?limit=3')
+    with django_assert_num_queries(len(context.captured_queries)):
+        response = user_client.get('/api/users/?limit=100')
+    assert sum(row['is_subscribed'] for row in response.data['results']) == 4
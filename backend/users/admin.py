@@ -12,6 +12,8 @@ class AdminFGUser(admin.ModelAdmin):
         'first_name',
         'last_name',
         'email',
+        'recipes_count',
+        'followers_count',
     )
     list_editable = ('username', 'email',
                      'first_name', 'last_name', )
@@ -32,6 +34,7 @@ class AdminRecipes(admin.ModelAdmin):
         'author',
         'text',
         'cooking_time',
+        'favorites_count',
     )
 
     list_editable = ('name', 'author', )
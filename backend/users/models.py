@@ -1,12 +1,28 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from rest_framework.exceptions import ValidationError
 
 REGEX_VALIDATOR = RegexValidator(
     regex=r'^(?!foodgram$)(?!me$)(?!$)[\w.@+-]+\Z(?! +$)')
 
 
+class UserQuerySet(models.QuerySet):
+
+    def with_subscribed(self, user):
+        if user.is_anonymous:
+            return self.annotate(is_subscribed=Value(False))
+        return self.annotate(is_subscribed=Exists(
+            UsersFollowing.objects.filter(following=OuterRef('pk'),
+                                          follower=user,
+                                          is_follow=True)))
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
 
     username = models.CharField(
@@ -27,6 +43,12 @@ class User(AbstractUser):
     password = models.CharField(max_length=150, blank=False,
                                 verbose_name='Пароль', null=False,
                                 unique=False)
+    recipes_count = models.IntegerField(
+        default=0, editable=False, verbose_name='Рецептов')
+    followers_count = models.IntegerField(
+        default=0, editable=False, verbose_name='Подписчиков')
+
+    objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
@@ -68,6 +90,14 @@ class UsersFollowing(models.Model):
                 name='no_self_follow'
             )
         ]
+        indexes = [
+            models.Index(fields=['follower', 'following'],
+                         condition=models.Q(is_follow=True),
+                         name='following_active_idx'),
+            models.Index(fields=['follower', '-created_at'],
+                         condition=models.Q(is_follow=True),
+                         name='following_active_created_idx'),
+        ]
 
     def __str__(self):
         return f"Подписчик: '{self.follower}', Инфлюенсер: '{self.following}'"